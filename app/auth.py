@@ -4,7 +4,9 @@ from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from app.config import settings
 from app.database import get_db
 from app.models import User
@@ -49,9 +51,10 @@ def verify_token(token: str, credentials_exception):
     
     return token_data
 
-def authenticate_user(db: Session, username: str, password: str):
+async def authenticate_user(db: AsyncSession, username: str, password: str):
     """Authenticate a user with username and password"""
-    user = db.query(User).filter(User.username == username).first()
+    result = await db.execute(select(User).where(User.username == username))
+    user = result.scalar_one_or_none()
     if not user:
         return False
     if not verify_password(password, user.hashed_password):
@@ -60,7 +63,7 @@ def authenticate_user(db: Session, username: str, password: str):
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get the current authenticated user"""
     credentials_exception = HTTPException(
@@ -70,7 +73,13 @@ async def get_current_user(
     )
     
     token_data = verify_token(credentials.credentials, credentials_exception)
-    user = db.query(User).filter(User.username == token_data.username).first()
+    # Load the tech stack with the user; most routes read it
+    result = await db.execute(
+        select(User).options(selectinload(User.tech_stacks)).where(
+            User.username == token_data.username
+        )
+    )
+    user = result.scalar_one_or_none()
     if user is None:
         raise credentials_exception
     return user
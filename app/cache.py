@@ -0,0 +1,52 @@
+import json
+import logging
+from typing import Any, Optional
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+def get_redis(request: Request):
+    """Get the shared Redis client created in the application lifespan"""
+    return getattr(request.app.state, "redis", None)
+
+async def cache_get(redis, key: str, field: Optional[str] = None) -> Optional[Any]:
+    """Read a cached JSON value; returns None on a miss or if Redis is unavailable"""
+    if redis is None:
+        return None
+    try:
+        value = await (redis.hget(key, field) if field is not None else redis.get(key))
+    except RedisError as e:
+        logger.debug(f"Cache read failed for {key}: {e}")
+        return None
+    return json.loads(value) if value is not None else None
+
+async def cache_set(redis, key: str, value: Any, expire: int, field: Optional[str] = None):
+    """Cache a JSON-serializable value for `expire` seconds
+
+    With `field`, the value is stored in a hash so that all fields of `key`
+    can be invalidated together.
+    """
+    if redis is None:
+        return
+    data = json.dumps(jsonable_encoder(value))
+    try:
+        if field is not None:
+            async with redis.pipeline(transaction=False) as pipe:
+                pipe.hset(key, field, data)
+                pipe.expire(key, expire)
+                await pipe.execute()
+        else:
+            await redis.set(key, data, ex=expire)
+    except RedisError as e:
+        logger.debug(f"Cache write failed for {key}: {e}")
+
+async def cache_delete(redis, key: str):
+    """Invalidate a cached value"""
+    if redis is None:
+        return
+    try:
+        await redis.delete(key)
+    except RedisError as e:
+        logger.debug(f"Cache invalidation failed for {key}: {e}")
@@ -1,12 +1,19 @@
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
 from typing import Optional
 
 class Settings(BaseSettings):
+    model_config = SettingsConfigDict(env_file=".env")
+    
     # OpenAI API Configuration
     openai_api_key: str
     
     # Database Configuration
     database_url: str
+    db_pool_size: int = 20
+    db_max_overflow: int = 20
+    db_pool_timeout: int = 10
+    # HNSW candidate list size for similarity search; higher improves recall, lower is faster
+    hnsw_ef_search: int = 40
     
     # Authentication Configuration
     secret_key: str
@@ -16,11 +23,14 @@ class Settings(BaseSettings):
     # Redis Configuration
     redis_url: str = "redis://localhost:6379"
     
+    # Optional local fastText model (.bin/.ftz) for the topic classifier; needs the
+    # fasttext package. When unset, the classifier falls back to an OpenAI call.
+    topic_classifier_path: Optional[str] = None
+    
     # Application Configuration
     app_name: str = "Software Engineer Chatbot"
     debug: bool = False
-    
-    class Config:
-        env_file = ".env"
+    trusted_proxy: bool = False  # Set when behind a proxy that sets X-Forwarded-For
+    trusted_proxy_hops: int = 1  # Number of trusted proxies that append to X-Forwarded-For
 
 settings = Settings()
\ No newline at end of file
@@ -1,6 +1,5 @@
-from sqlalchemy import create_engine, MetaData
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import AsyncAttrs, create_async_engine, async_sessionmaker
+from sqlalchemy.orm import declarative_base
 from app.config import settings
 import logging
 
@@ -10,32 +9,36 @@ logger = logging.getLogger(__name__)
 def get_database_url():
     url = settings.database_url
     # Convert postgresql:// to postgresql+psycopg:// for psycopg3
+    # (the same URL selects psycopg's async mode under create_async_engine)
     if url.startswith("postgresql://") and "+" not in url.split("://")[0]:
         url = url.replace("postgresql://", "postgresql+psycopg://", 1)
     return url
 
 # Create database engine
-engine = create_engine(
+engine = create_async_engine(
     get_database_url(),
+    # Chat requests hold a connection while waiting on OpenAI; size the pool for that
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_timeout=settings.db_pool_timeout,
     pool_pre_ping=True,
     pool_recycle=300,
     echo=settings.debug
 )
 
 # Create SessionLocal class
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Objects stay loaded after commit; lazy refreshes are not possible under asyncio
+SessionLocal = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
 
 # Create Base class for models
-Base = declarative_base()
+Base = declarative_base(cls=AsyncAttrs)
 
 # Dependency to get database session
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    except Exception as e:
-        logger.error(f"Database session error: {e}")
-        db.rollback()
-        raise
-    finally:
-        db.close()
\ No newline at end of file
+async def get_db():
+    async with SessionLocal() as db:
+        try:
+            yield db
+        except Exception as e:
+            logger.error(f"Database session error: {e}")
+            await db.rollback()
+            raise
@@ -3,13 +3,20 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
+from contextlib import asynccontextmanager
+from redis import asyncio as aioredis
+from sqlalchemy import text
 import uvicorn
 import logging
+import time
 
 from app.routes import auth, chat, techstack, interview
 from app.database import engine, Base
 from app.config import settings
-from app.middleware import RateLimitMiddleware, SecurityHeadersMiddleware, RequestLoggingMiddleware
+from app.middleware import (
+    RateLimitMiddleware, SecurityHeadersMiddleware, RequestLoggingMiddleware, ProfilerMiddleware
+)
+from app.services.openai_service import openai_service
 
 # Configure logging
 logging.basicConfig(
@@ -18,27 +25,60 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Create database tables
-try:
-    Base.metadata.create_all(bind=engine)
-    logger.info("Database tables created successfully")
-except Exception as e:
-    logger.error(f"Failed to create database tables: {e}")
-    raise
+REDIS_SOCKET_TIMEOUT = 0.5  # seconds
+HEALTH_CACHE_TTL = 5  # seconds
+HEALTHY_RESPONSE = {
+    "status": "healthy",
+    "message": "Software Engineer Chatbot is running",
+    "database": "connected"
+}
+last_healthy_at = float("-inf")  # monotonic time of the last successful readiness check
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create shared clients on startup and close them on shutdown"""
+    # Create database tables
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        logger.info("Database tables created successfully")
+    except Exception as e:
+        logger.error(f"Failed to create database tables: {e}")
+        raise
+    
+    # Shared Redis client (rate limiting and response caching). Redis is optional,
+    # so fail fast rather than stall requests on an unreachable server.
+    app.state.redis = aioredis.from_url(
+        settings.redis_url,
+        socket_connect_timeout=REDIS_SOCKET_TIMEOUT,
+        socket_timeout=REDIS_SOCKET_TIMEOUT
+    )
+    yield
+    await app.state.redis.aclose()
+    await openai_service.close()
+    await engine.dispose()
 
 app = FastAPI(
     title="Software Engineer Chatbot",
     description="An AI-powered chatbot for software engineers with tech stack support and interview questions",
     version="1.0.0",
     docs_url="/docs" if settings.debug else None,
-    redoc_url="/redoc" if settings.debug else None
+    redoc_url="/redoc" if settings.debug else None,
+    lifespan=lifespan
 )
 
 # Add security middleware first
 app.add_middleware(SecurityHeadersMiddleware)
-app.add_middleware(RateLimitMiddleware, requests_per_minute=100)
+app.add_middleware(
+    RateLimitMiddleware,
+    requests_per_minute=100,
+    trusted_proxy=settings.trusted_proxy,
+    trusted_proxy_hops=settings.trusted_proxy_hops
+)
 if settings.debug:
     app.add_middleware(RequestLoggingMiddleware)
+    # Append ?profile=1 to any request to get a pyinstrument report instead of the response
+    app.add_middleware(ProfilerMiddleware)
 
 # Add CORS middleware
 app.add_middleware(
@@ -64,21 +104,28 @@ async def root(request: Request):
     """Home page"""
     return templates.TemplateResponse("index.html", {"request": request})
 
+@app.get("/health/live")
+async def liveness_check():
+    """Liveness probe: the process is up, no dependencies are checked"""
+    return {"status": "ok"}
+
 @app.get("/health")
+@app.get("/health/ready")
 async def health_check():
-    """Health check endpoint"""
+    """Health check endpoint (readiness: verifies the database connection)"""
+    global last_healthy_at
+    # Serve a recent healthy result so frequent probes skip the database. Cached per
+    # process: a shared cache would let one healthy instance vouch for the others.
+    if time.monotonic() - last_healthy_at < HEALTH_CACHE_TTL:
+        return HEALTHY_RESPONSE
+    
     try:
-        # Test database connection
-        from app.database import SessionLocal
-        db = SessionLocal()
-        db.execute("SELECT 1")
-        db.close()
+        # Test database connection (a pooled connection, no session or ORM transaction)
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
         
-        return {
-            "status": "healthy", 
-            "message": "Software Engineer Chatbot is running",
-            "database": "connected"
-        }
+        last_healthy_at = time.monotonic()
+        return HEALTHY_RESPONSE
     except Exception as e:
         logger.error(f"Health check failed: {e}")
         return JSONResponse(
@@ -1,127 +1,314 @@
-from fastapi import Request, HTTPException, status
-from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
+from fastapi import status
+from fastapi.responses import HTMLResponse, JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from redis.exceptions import RedisError
+from cachetools import TTLCache
+import math
 import time
+import uuid
+from urllib.parse import parse_qs
 import logging
-from typing import Dict
-from collections import defaultdict, deque
+from typing import Dict, Tuple
 
 logger = logging.getLogger(__name__)
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    """Rate limiting middleware to prevent abuse of the API"""
-    
-    def __init__(self, app, requests_per_minute: int = 60):
-        super().__init__(app)
+RATE_LIMIT_WINDOW = 60  # seconds
+HEALTH_CHECK_PREFIX = "/health"  # probes bypass rate limiting and request logging
+# Seconds before an idle in-process bucket is dropped; a bucket idle for a full
+# window has refilled completely, so forgetting it does not change the outcome
+BUCKET_IDLE_TIMEOUT = 2 * RATE_LIMIT_WINDOW
+MAX_TRACKED_CLIENTS = 100_000  # per bucket, bounds fallback memory
+# Seconds to stay on the in-process limits after a Redis error before trying Redis again
+REDIS_RETRY_COOLDOWN = 10
+
+# Stricter (bucket, requests per minute) limits for the expensive OpenAI-backed endpoints
+ENDPOINT_RATE_LIMITS: Dict[str, Tuple[str, int]] = {
+    "/api/chat/message": ("chat", 20),
+    "/api/chat/message/stream": ("chat", 20),
+    "/api/interview/generate": ("interview", 10),
+}
+
+# Atomic sliding window: trim expired entries, count, and admit in one round-trip.
+# KEYS[1] = bucket key, ARGV = now, window, limit, unique member
+# Returns {allowed, remaining, seconds until the oldest request leaves the window}
+RATE_LIMIT_SCRIPT = """
+local key = KEYS[1]
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+redis.call('ZREMRANGEBYSCORE', key, 0, now - window)
+local count = redis.call('ZCARD', key)
+local allowed = 0
+if count < limit then
+    redis.call('ZADD', key, now, ARGV[4])
+    redis.call('EXPIRE', key, window)
+    allowed = 1
+    count = count + 1
+end
+local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+local reset = window
+if oldest[2] then
+    reset = math.ceil(tonumber(oldest[2]) + window - now)
+end
+return {allowed, limit - count, reset}
+"""
+
+class RateLimitMiddleware:
+    """Rate limiting middleware to prevent abuse of the API
+
+    Limits are tracked in Redis (``app.state.redis``) so they hold across workers.
+    If Redis is unreachable, the middleware falls back to per-process token buckets.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        requests_per_minute: int = 60,
+        trusted_proxy: bool = False,
+        trusted_proxy_hops: int = 1
+    ):
+        self.app = app
         self.requests_per_minute = requests_per_minute
-        self.clients: Dict[str, deque] = defaultdict(deque)
-        self.chat_clients: Dict[str, deque] = defaultdict(deque)
-    
-    async def dispatch(self, request: Request, call_next):
+        # Only trust X-Forwarded-For when running behind a known proxy/load balancer,
+        # and only the hops appended by our own proxies (the rightmost ones)
+        self.trusted_proxy = trusted_proxy
+        self.trusted_proxy_hops = max(1, trusted_proxy_hops)
+        # Per-process fallback: (tokens, last_refill) per client IP, one bounded cache per bucket
+        self.buckets: Dict[str, TTLCache] = {
+            name: TTLCache(maxsize=MAX_TRACKED_CLIENTS, ttl=BUCKET_IDLE_TIMEOUT)
+            for name in ("chat", "interview", "default")
+        }
+        self._script = None
+        self._script_client = None
+        self._redis_available = True
+        self._redis_retry_at = 0.0
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["path"].startswith(HEALTH_CHECK_PREFIX):
+            await self.app(scope, receive, send)
+            return
+
         # Get client IP
-        client_ip = request.client.host
+        client_ip = self._get_client_ip(scope)
         current_time = time.time()
-        
-        # Different rate limits for different endpoints
-        if "/api/chat/message" in str(request.url):
-            # More restrictive rate limiting for chat messages
-            return await self._apply_rate_limit(
-                request, call_next, client_ip, current_time, 
-                self.chat_clients, requests_per_minute=20
-            )
-        elif "/api/interview/generate" in str(request.url):
-            # Rate limiting for interview question generation
-            return await self._apply_rate_limit(
-                request, call_next, client_ip, current_time, 
-                self.clients, requests_per_minute=10
-            )
-        else:
-            # Standard rate limiting for other endpoints
-            return await self._apply_rate_limit(
-                request, call_next, client_ip, current_time, 
-                self.clients, requests_per_minute=self.requests_per_minute
-            )
-    
-    async def _apply_rate_limit(
-        self, 
-        request: Request, 
-        call_next, 
-        client_ip: str, 
-        current_time: float,
-        client_dict: Dict[str, deque], 
-        requests_per_minute: int
-    ):
-        # Clean old requests (older than 1 minute)
-        client_requests = client_dict[client_ip]
-        while client_requests and current_time - client_requests[0] > 60:
-            client_requests.popleft()
-        
-        # Check if rate limit exceeded
-        if len(client_requests) >= requests_per_minute:
+
+        # Different rate limits for different endpoints; standard limit for the rest
+        bucket, requests_per_minute = ENDPOINT_RATE_LIMITS.get(
+            scope["path"], ("default", self.requests_per_minute)
+        )
+
+        redis = getattr(scope["app"].state, "redis", None) if "app" in scope else None
+        allowed, remaining, reset = await self._apply_rate_limit(
+            redis, bucket, client_ip, current_time, requests_per_minute
+        )
+        rate_limit_headers = [
+            (b"x-ratelimit-limit", str(requests_per_minute).encode()),
+            (b"x-ratelimit-remaining", str(remaining).encode()),
+            (b"x-ratelimit-reset", str(reset).encode()),
+        ]
+
+        if not allowed:
             logger.warning(f"Rate limit exceeded for IP: {client_ip}")
-            return JSONResponse(
+            response = JSONResponse(
                 status_code=status.HTTP_429_TOO_MANY_REQUESTS,
                 content={
                     "detail": "Rate limit exceeded. Please try again later.",
-                    "retry_after": 60
+                    "retry_after": reset
                 }
             )
-        
-        # Add current request
-        client_requests.append(current_time)
-        
+            response.raw_headers.extend(rate_limit_headers)
+            response.raw_headers.append((b"retry-after", str(reset).encode()))
+            await response(scope, receive, send)
+            return
+
+        async def send_with_headers(message: Message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.extend(rate_limit_headers)
+                message["headers"] = headers
+            await send(message)
+
         # Process the request
-        response = await call_next(request)
-        return response
+        await self.app(scope, receive, send_with_headers)
+
+    def _get_client_ip(self, scope: Scope) -> str:
+        """Resolve the client IP, using the X-Forwarded-For hop our trusted proxies recorded
+
+        Clients can write anything into the left of the header; each trusted proxy
+        appends the address it saw, so the client is `trusted_proxy_hops` from the right.
+        """
+        if self.trusted_proxy:
+            for name, value in scope["headers"]:
+                if name != b"x-forwarded-for":
+                    continue
+                hops = [hop.strip() for hop in value.decode("latin-1").split(",") if hop.strip()]
+                if hops:
+                    return hops[max(0, len(hops) - self.trusted_proxy_hops)]
+                break
+
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    async def _apply_rate_limit(
+        self,
+        redis,
+        bucket: str,
+        client_ip: str,
+        current_time: float,
+        requests_per_minute: int
+    ) -> Tuple[bool, int, int]:
+        """Record the request and return whether it is allowed, the remaining quota,
+        and the seconds until the quota frees up again
+        """
+        if redis is not None and current_time >= self._redis_retry_at:
+            try:
+                allowed, remaining, reset = await self._get_script(redis)(
+                    keys=[f"rl:{bucket}:{client_ip}"],
+                    args=[current_time, RATE_LIMIT_WINDOW, requests_per_minute, uuid.uuid4().hex]
+                )
+                self._redis_available = True
+                return bool(allowed), int(remaining), int(reset)
+            except RedisError as e:
+                # Don't make every request wait on an unreachable Redis
+                self._redis_retry_at = current_time + REDIS_RETRY_COOLDOWN
+                if self._redis_available:
+                    logger.warning(f"Redis rate limiting unavailable, using in-process limits: {e}")
+                    self._redis_available = False
+
+        # Refill the client's token bucket for the time elapsed since the last request
+        client_buckets = self.buckets[bucket]
+        capacity = float(requests_per_minute)
+        refill_rate = requests_per_minute / RATE_LIMIT_WINDOW  # tokens per second
+        tokens, last_refill = client_buckets.get(client_ip, (capacity, current_time))
+        elapsed = current_time - last_refill
+        tokens = min(capacity, tokens + elapsed * refill_rate)
+
+        # Check if rate limit exceeded; the client may retry once a whole token has refilled
+        if tokens < 1.0:
+            client_buckets[client_ip] = (tokens, current_time)
+            return False, 0, max(1, math.ceil((1.0 - tokens) / refill_rate))
+
+        # Consume a token for the current request; report when the bucket is full again
+        tokens -= 1.0
+        client_buckets[client_ip] = (tokens, current_time)
+        return True, int(tokens), max(1, math.ceil((capacity - tokens) / refill_rate))
 
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
+    def _get_script(self, redis):
+        """Register the Lua script once per client; redis-py calls it via EVALSHA"""
+        if self._script is None or self._script_client is not redis:
+            self._script = redis.register_script(RATE_LIMIT_SCRIPT)
+            self._script_client = redis
+        return self._script
+
+class SecurityHeadersMiddleware:
     """Add security headers to responses"""
-    
-    async def dispatch(self, request: Request, call_next):
-        response = await call_next(request)
-        
-        # Add security headers
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-        response.headers["Content-Security-Policy"] = (
-            "default-src 'self'; "
-            "script-src 'self' 'unsafe-inline' https://cdn.jsdelivr.net https://cdnjs.cloudflare.com; "
-            "style-src 'self' 'unsafe-inline' https://cdn.jsdelivr.net https://cdnjs.cloudflare.com; "
-            "font-src 'self' https://cdnjs.cloudflare.com; "
-            "img-src 'self' data: https:; "
-            "connect-src 'self'"
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        # Encode the static headers once; frozen so responses can't mutate the shared copy
+        self.security_headers: Tuple[Tuple[bytes, bytes], ...] = (
+            (b"x-content-type-options", b"nosniff"),
+            (b"x-frame-options", b"DENY"),
+            (b"x-xss-protection", b"1; mode=block"),
+            (b"referrer-policy", b"strict-origin-when-cross-origin"),
+            (b"content-security-policy", (
+                "default-src 'self'; "
+                "script-src 'self' 'unsafe-inline' https://cdn.jsdelivr.net https://cdnjs.cloudflare.com; "
+                "style-src 'self' 'unsafe-inline' https://cdn.jsdelivr.net https://cdnjs.cloudflare.com; "
+                "font-src 'self' https://cdnjs.cloudflare.com; "
+                "img-src 'self' data: https:; "
+                "connect-src 'self'"
+            ).encode("latin-1")),
         )
-        
-        return response
 
-class RequestLoggingMiddleware(BaseHTTPMiddleware):
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_headers(message: Message):
+            if message["type"] == "http.response.start":
+                # Add security headers
+                message["headers"] = [*message.get("headers", ()), *self.security_headers]
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+class RequestLoggingMiddleware:
     """Log requests for monitoring and debugging"""
-    
-    async def dispatch(self, request: Request, call_next):
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["path"].startswith(HEALTH_CHECK_PREFIX):
+            await self.app(scope, receive, send)
+            return
+
         start_time = time.time()
-        
+        method = scope["method"]
+        url = scope["path"]
+        if scope.get("query_string"):
+            url += "?" + scope["query_string"].decode("latin-1")
+        client = scope.get("client")
+
         # Log incoming request
         logger.info(
-            f"Request: {request.method} {request.url} from {request.client.host}"
+            f"Request: {method} {url} from {client[0] if client else 'unknown'}"
         )
-        
+
+        async def send_with_logging(message: Message):
+            if message["type"] == "http.response.start":
+                # Log response
+                process_time = time.time() - start_time
+                logger.info(
+                    f"Response: {message['status']} in {process_time:.3f}s"
+                )
+            await send(message)
+
         try:
-            response = await call_next(request)
-            
-            # Log response
-            process_time = time.time() - start_time
-            logger.info(
-                f"Response: {response.status_code} in {process_time:.3f}s"
-            )
-            
-            return response
-            
+            await self.app(scope, receive, send_with_logging)
+
         except Exception as e:
             process_time = time.time() - start_time
             logger.error(
-                f"Request failed: {request.method} {request.url} "
+                f"Request failed: {method} {url} "
                 f"in {process_time:.3f}s - {str(e)}"
             )
-            raise
\ No newline at end of file
+            raise
+
+class ProfilerMiddleware:
+    """Profile a single request with pyinstrument when ``?profile=1`` is passed
+
+    Only meant for debug runs: the handler's response is replaced by the HTML report.
+    """
+
+    def __init__(self, app: ASGIApp):
+        # Imported here so pyinstrument is only needed when the middleware is enabled
+        from pyinstrument import Profiler
+
+        self.app = app
+        self.profiler_class = Profiler
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not scope.get("query_string"):
+            await self.app(scope, receive, send)
+            return
+
+        query = parse_qs(scope["query_string"].decode("latin-1"))
+        if query.get("profile", [""])[0] not in ("1", "true"):
+            await self.app(scope, receive, send)
+            return
+
+        async def discard_response(message: Message):
+            pass
+
+        profiler = self.profiler_class(async_mode="enabled")
+        profiler.start()
+        try:
+            await self.app(scope, receive, discard_response)
+        finally:
+            profiler.stop()
+
+        response = HTMLResponse(profiler.output_html())
+        await response(scope, receive, send)
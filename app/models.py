@@ -1,8 +1,7 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Boolean, JSON, Float, Table
-from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Boolean, JSON, Float, Table, Index, cast
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from pgvector.sqlalchemy import Vector
+from pgvector.sqlalchemy import HALFVEC, Vector
 import uuid
 
 from app.database import Base
@@ -44,6 +43,11 @@ class TechStack(Base):
     
     # Relationships
     users = relationship("User", secondary=user_techstacks, back_populates="tech_stacks")
+    
+    __table_args__ = (
+        # Serves the per-category listing paged by id
+        Index('ix_techstacks_category_id', 'category', 'id'),
+    )
 
 class ChatSession(Base):
     __tablename__ = "chat_sessions"
@@ -59,6 +63,11 @@ class ChatSession(Base):
     # Relationships
     user = relationship("User", back_populates="chat_sessions")
     messages = relationship("ChatMessage", back_populates="session", cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        # Serves the per-user active session list ordered by most recent
+        Index('ix_chat_sessions_user_active_updated', 'user_id', 'is_active', 'updated_at'),
+    )
 
 class ChatMessage(Base):
     __tablename__ = "chat_messages"
@@ -73,6 +82,21 @@ class ChatMessage(Base):
     
     # Relationships
     session = relationship("ChatSession", back_populates="messages")
+    
+    __table_args__ = (
+        # Approximate nearest-neighbour index for similarity search (pgvector >= 0.7).
+        # Indexing a half-precision cast halves the index size and the memory read
+        # per query; ranking is barely affected and the column keeps full precision.
+        Index(
+            'ix_chat_messages_embedding_halfvec_hnsw',
+            cast(embedding, HALFVEC(1536)).label('embedding'),
+            postgresql_using='hnsw',
+            postgresql_with={'m': 16, 'ef_construction': 64},
+            postgresql_ops={'embedding': 'halfvec_cosine_ops'}
+        ),
+        # Serves fetching a session's messages in chronological order
+        Index('ix_chat_messages_session_created', 'session_id', 'created_at'),
+    )
 
 class InterviewQuestion(Base):
     __tablename__ = "interview_questions"
@@ -84,6 +108,24 @@ class InterviewQuestion(Base):
     tech_stack = Column(String)  # Associated technology
     expected_answer = Column(Text)
     created_at = Column(DateTime, server_default=func.now())
+    
+    __table_args__ = (
+        # Named unique index rather than a column constraint so init_db's missing-index
+        # check adds it to existing databases; generated questions upsert on it
+        Index('uq_interview_questions_question', 'question', unique=True),
+        # Serve the newest-first saved question listing (keyset on created_at, id),
+        # unfiltered and filtered by category or difficulty level
+        Index('ix_interview_questions_created', created_at.desc(), id.desc()),
+        Index('ix_interview_questions_category_created', category, created_at.desc(), id.desc()),
+        Index('ix_interview_questions_difficulty_created', difficulty_level, created_at.desc(), id.desc()),
+        # Trigram index so substring matches on tech_stack (LIKE '%...%') can use an index (pg_trgm)
+        Index(
+            'ix_interview_questions_tech_stack_trgm',
+            tech_stack,
+            postgresql_using='gin',
+            postgresql_ops={'tech_stack': 'gin_trgm_ops'}
+        ),
+    )
 
 class UserPreference(Base):
     __tablename__ = "user_preferences"
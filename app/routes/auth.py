@@ -1,6 +1,7 @@
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
 from app.models import User
 from app.schemas import UserCreate, UserResponse, UserLogin, Token, UserUpdate
@@ -15,10 +16,11 @@ from app.config import settings
 router = APIRouter()
 
 @router.post("/register", response_model=UserResponse)
-async def register_user(user: UserCreate, db: Session = Depends(get_db)):
+async def register_user(user: UserCreate, db: AsyncSession = Depends(get_db)):
     """Register a new user"""
     # Check if username already exists
-    db_user = db.query(User).filter(User.username == user.username).first()
+    result = await db.execute(select(User).where(User.username == user.username))
+    db_user = result.scalar_one_or_none()
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -26,7 +28,8 @@ async def register_user(user: UserCreate, db: Session = Depends(get_db)):
         )
     
     # Check if email already exists
-    db_user = db.query(User).filter(User.email == user.email).first()
+    result = await db.execute(select(User).where(User.email == user.email))
+    db_user = result.scalar_one_or_none()
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -45,15 +48,16 @@ async def register_user(user: UserCreate, db: Session = Depends(get_db)):
     )
     
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    # Relationships cannot lazy-load under asyncio; load the tech stack for the response
+    await db.refresh(db_user, ["tech_stacks"])
     
     return db_user
 
 @router.post("/login", response_model=Token)
-async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
+async def login(user_credentials: UserLogin, db: AsyncSession = Depends(get_db)):
     """Login user and return JWT token"""
-    user = authenticate_user(db, user_credentials.username, user_credentials.password)
+    user = await authenticate_user(db, user_credentials.username, user_credentials.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -77,7 +81,7 @@ async def read_current_user(current_user: User = Depends(get_current_active_user
 async def update_current_user(
     user_update: UserUpdate,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update current user information"""
     if user_update.full_name is not None:
@@ -87,7 +91,6 @@ async def update_current_user(
     if user_update.current_role is not None:
         current_user.current_role = user_update.current_role
     
-    db.commit()
-    db.refresh(current_user)
+    await db.commit()
     
     return current_user
\ No newline at end of file
@@ -1,22 +1,52 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.database import get_db
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
+from app.database import SessionLocal, get_db
 from app.models import User, ChatSession, ChatMessage, TechStack
 from app.schemas import (
     ChatMessageCreate, ChatMessageResponse, ChatResponse, 
     ChatSessionResponse, ChatHistoryRequest, ChatHistoryResponse
 )
 from app.auth import get_current_active_user
+from app.cache import get_redis, cache_get, cache_set, cache_delete
 from app.services.openai_service import openai_service
+import asyncio
+import json
+import logging
 import uuid
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
+SESSIONS_CACHE_TTL = 30  # seconds
+
+STREAM_INTERRUPTED_MESSAGE = "The response was interrupted. Please try again."
+
+# Strong references to in-flight background saves so they aren't garbage collected
+background_tasks = set()
+
+# Columns needed to render messages; leaves out the 1536-dim embedding
+MESSAGE_COLUMNS = load_only(
+    ChatMessage.id,
+    ChatMessage.session_id,
+    ChatMessage.message_type,
+    ChatMessage.content,
+    ChatMessage.tech_context,
+    ChatMessage.created_at
+)
+
+def sessions_cache_key(user_id: int) -> str:
+    return f"sessions:{user_id}"
+
 @router.post("/session", response_model=ChatSessionResponse)
 async def create_chat_session(
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    redis = Depends(get_redis)
 ):
     """Create a new chat session"""
     session = ChatSession(
@@ -26,34 +56,52 @@ async def create_chat_session(
     )
     
     db.add(session)
-    db.commit()
-    db.refresh(session)
+    await db.commit()
+    await db.refresh(session)
+    await cache_delete(redis, sessions_cache_key(current_user.id))
     
     return session
 
 @router.get("/sessions", response_model=List[ChatSessionResponse])
 async def get_user_chat_sessions(
     current_user: User = Depends(get_current_active_user),
-    limit: int = 20
+    limit: int = 20,
+    db: AsyncSession = Depends(get_db),
+    redis = Depends(get_redis)
 ):
     """Get user's chat sessions"""
-    sessions = [session for session in current_user.chat_sessions if session.is_active]
-    # Sort by most recent
-    sessions.sort(key=lambda x: x.updated_at, reverse=True)
-    return sessions[:limit]
+    cache_key = sessions_cache_key(current_user.id)
+    cached = await cache_get(redis, cache_key, field=str(limit))
+    if cached is not None:
+        return cached
+    
+    # Filter, sort by most recent and limit in the database
+    result = await db.execute(
+        select(ChatSession).where(
+            ChatSession.user_id == current_user.id,
+            ChatSession.is_active == True
+        ).order_by(ChatSession.updated_at.desc()).limit(limit)
+    )
+    sessions = [ChatSessionResponse.model_validate(session) for session in result.scalars()]
+    
+    await cache_set(redis, cache_key, sessions, SESSIONS_CACHE_TTL, field=str(limit))
+    return sessions
 
 @router.get("/session/{session_id}/messages", response_model=List[ChatMessageResponse])
 async def get_session_messages(
     session_id: str,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get messages from a specific chat session"""
     # Verify session belongs to user
-    session = db.query(ChatSession).filter(
-        ChatSession.session_id == session_id,
-        ChatSession.user_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(ChatSession).where(
+            ChatSession.session_id == session_id,
+            ChatSession.user_id == current_user.id
+        )
+    )
+    session = result.scalar_one_or_none()
     
     if not session:
         raise HTTPException(
@@ -61,20 +109,25 @@ async def get_session_messages(
             detail="Chat session not found"
         )
     
-    return session.messages
+    result = await db.execute(
+        select(ChatMessage).options(MESSAGE_COLUMNS).where(
+            ChatMessage.session_id == session.id
+        ).order_by(ChatMessage.created_at.asc(), ChatMessage.id.asc())
+    )
+    messages = result.scalars().all()
+    
+    return messages
 
-@router.post("/message", response_model=ChatResponse)
-async def send_message(
-    message_data: ChatMessageCreate,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
-):
-    """Send a message and get AI response"""
+async def prepare_chat_turn(session_id: str, current_user: User, db: AsyncSession):
+    """Load the session, tech stack context and recent history for a new message"""
     # Verify session belongs to user
-    session = db.query(ChatSession).filter(
-        ChatSession.session_id == message_data.session_id,
-        ChatSession.user_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(ChatSession).where(
+            ChatSession.session_id == session_id,
+            ChatSession.user_id == current_user.id
+        )
+    )
+    session = result.scalar_one_or_none()
     
     if not session:
         raise HTTPException(
@@ -82,21 +135,6 @@ async def send_message(
             detail="Chat session not found"
         )
     
-    # Save user message
-    user_message = ChatMessage(
-        session_id=session.id,
-        message_type="user",
-        content=message_data.content
-    )
-    
-    # Generate embeddings for the user message
-    user_embedding = await openai_service.generate_embeddings(message_data.content)
-    if user_embedding:
-        user_message.embedding = user_embedding
-    
-    db.add(user_message)
-    db.commit()
-    
     # Get user's tech stack context
     tech_stack_data = []
     for tech in current_user.tech_stacks:
@@ -106,18 +144,98 @@ async def send_message(
             'description': tech.description
         })
     
-    # Get recent chat history for context
-    recent_messages = db.query(ChatMessage).filter(
-        ChatMessage.session_id == session.id
-    ).order_by(ChatMessage.created_at.desc()).limit(10).all()
+    # Get recent chat history for context (skip the embedding column).
+    # Nothing from this turn has been flushed yet, so these are all earlier messages.
+    result = await db.execute(
+        select(
+            ChatMessage.message_type, ChatMessage.content, ChatMessage.created_at
+        ).where(
+            ChatMessage.session_id == session.id
+        ).order_by(ChatMessage.created_at.desc(), ChatMessage.id.desc()).limit(10)
+    )
+    recent_messages = result.all()
     
     chat_history = []
-    for msg in reversed(recent_messages[:-1]):  # Exclude the message we just added
+    for msg in reversed(recent_messages):
         chat_history.append({
             'message_type': msg.message_type,
             'content': msg.content
         })
     
+    # End the read transaction so the connection returns to the pool during the OpenAI calls
+    await db.commit()
+    
+    return session, tech_stack_data, chat_history
+
+async def save_chat_exchange(
+    db: AsyncSession,
+    session: ChatSession,
+    user_content: str,
+    ai_response_text: str,
+    tech_stack_data: List[Dict[str, Any]],
+    first_exchange: bool,
+    embeddings: Optional[List[List[float]]] = None
+) -> List[ChatMessage]:
+    """Store a user message and the AI response, with their embeddings if already computed"""
+    user_message = ChatMessage(
+        session_id=session.id,
+        message_type="user",
+        content=user_content
+    )
+    ai_message = ChatMessage(
+        session_id=session.id,
+        message_type="assistant",
+        content=ai_response_text,
+        tech_context={"tech_stack": tech_stack_data}
+    )
+    
+    if embeddings:
+        user_embedding, ai_embedding = embeddings
+        if user_embedding:
+            user_message.embedding = user_embedding
+        if ai_embedding:
+            ai_message.embedding = ai_embedding
+    
+    db.add(user_message)
+    db.add(ai_message)
+    
+    # Update session timestamp
+    session.updated_at = func.now()
+    
+    # Update session title if it's the first exchange
+    if first_exchange:
+        # Generate a title based on the first message
+        title_words = user_content.split()[:6]
+        session.title = " ".join(title_words) + ("..." if len(title_words) == 6 else "")
+    
+    await db.commit()
+    return [user_message, ai_message]
+
+async def embed_chat_messages(messages: List[ChatMessage]):
+    """Generate embeddings for already saved messages and store them"""
+    # Call the API before taking a connection, so none is held while waiting on it
+    embeddings = await openai_service.generate_embeddings_batch([message.content for message in messages])
+    rows = [
+        {"id": message.id, "embedding": embedding}
+        for message, embedding in zip(messages, embeddings) if embedding
+    ]
+    if rows:
+        async with SessionLocal() as db:
+            await db.execute(update(ChatMessage), rows)
+            await db.commit()
+
+@router.post("/message", response_model=ChatResponse)
+async def send_message(
+    message_data: ChatMessageCreate,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db),
+    redis = Depends(get_redis)
+):
+    """Send a message and get AI response"""
+    session, tech_stack_data, chat_history = await prepare_chat_turn(
+        message_data.session_id, current_user, db
+    )
+    
     # Generate AI response
     try:
         ai_response_text = await openai_service.generate_chat_response(
@@ -126,31 +244,16 @@ async def send_message(
             chat_history=chat_history
         )
         
-        # Save AI response
-        ai_message = ChatMessage(
-            session_id=session.id,
-            message_type="assistant",
-            content=ai_response_text,
-            tech_context={"tech_stack": tech_stack_data}
+        # Generate embeddings for both messages in one request
+        embeddings = await openai_service.generate_embeddings_batch(
+            [message_data.content, ai_response_text]
         )
-        
-        # Generate embeddings for AI response
-        ai_embedding = await openai_service.generate_embeddings(ai_response_text)
-        if ai_embedding:
-            ai_message.embedding = ai_embedding
-        
-        db.add(ai_message)
-        
-        # Update session timestamp
-        session.updated_at = user_message.created_at
-        
-        # Update session title if it's the first exchange
-        if len(session.messages) <= 2:  # user message + ai response
-            # Generate a title based on the first message
-            title_words = message_data.content.split()[:6]
-            session.title = " ".join(title_words) + ("..." if len(title_words) == 6 else "")
-        
-        db.commit()
+        await save_chat_exchange(
+            db, session, message_data.content, ai_response_text,
+            tech_stack_data, first_exchange=not chat_history, embeddings=embeddings
+        )
+        # The session's title and position in the list may have changed
+        await cache_delete(redis, sessions_cache_key(current_user.id))
         
         return ChatResponse(
             message=ai_response_text,
@@ -159,23 +262,98 @@ async def send_message(
         )
         
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to generate response"
         )
 
+@router.post("/message/stream")
+async def send_message_stream(
+    message_data: ChatMessageCreate,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db),
+    redis = Depends(get_redis)
+):
+    """Send a message and stream the AI response as server-sent events
+
+    Each event carries a JSON object with a `content` chunk; the stream ends
+    with `data: [DONE]`. The exchange is saved before `[DONE]` is sent, so the next
+    message sees it; embeddings are filled in afterwards in the background.
+    If generation fails partway through, an `error` event ends the stream and
+    the truncated reply is not saved.
+    """
+    session, tech_stack_data, chat_history = await prepare_chat_turn(
+        message_data.session_id, current_user, db
+    )
+    user_id = current_user.id
+    
+    async def persist_exchange(ai_response_text: str) -> List[ChatMessage]:
+        # The request's session may already be closed while streaming; save with a fresh one
+        try:
+            async with SessionLocal() as save_db:
+                chat_session = await save_db.get(ChatSession, session.id)
+                messages = await save_chat_exchange(
+                    save_db, chat_session, message_data.content, ai_response_text,
+                    tech_stack_data, first_exchange=not chat_history
+                )
+            await cache_delete(redis, sessions_cache_key(user_id))
+            return messages
+        except Exception as e:
+            logger.error(f"Failed to save streamed chat exchange: {e}")
+            return []
+    
+    async def embed_exchange(messages: List[ChatMessage]):
+        try:
+            await embed_chat_messages(messages)
+        except Exception as e:
+            logger.error(f"Failed to store streamed chat embeddings: {e}")
+    
+    async def event_stream():
+        chunks = []
+        try:
+            async for text in openai_service.generate_chat_response_stream(
+                query=message_data.content,
+                user_tech_stack=tech_stack_data,
+                chat_history=chat_history
+            ):
+                chunks.append(text)
+                yield f"data: {json.dumps({'content': text})}\n\n"
+        except Exception as e:
+            logger.error(f"Chat stream interrupted: {e}")
+            yield f"data: {json.dumps({'error': STREAM_INTERRUPTED_MESSAGE})}\n\n"
+            return
+        
+        messages = await persist_exchange("".join(chunks))
+        yield "data: [DONE]\n\n"
+        
+        # Embed in the background so the stream closes without waiting on the API
+        if messages:
+            task = asyncio.create_task(embed_exchange(messages))
+            background_tasks.add(task)
+            task.add_done_callback(background_tasks.discard)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.delete("/session/{session_id}")
 async def delete_chat_session(
     session_id: str,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    redis = Depends(get_redis)
 ):
     """Delete a chat session"""
-    session = db.query(ChatSession).filter(
-        ChatSession.session_id == session_id,
-        ChatSession.user_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(ChatSession).where(
+            ChatSession.session_id == session_id,
+            ChatSession.user_id == current_user.id
+        )
+    )
+    session = result.scalar_one_or_none()
     
     if not session:
         raise HTTPException(
@@ -184,18 +362,20 @@ async def delete_chat_session(
         )
     
     session.is_active = False
-    db.commit()
+    await db.commit()
+    await cache_delete(redis, sessions_cache_key(current_user.id))
     
     return {"message": "Chat session deleted successfully"}
 
 @router.post("/history", response_model=ChatHistoryResponse)
 async def get_chat_history(
     history_request: ChatHistoryRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get chat history by username and optionally session_id"""
     # Find user by username
-    user = db.query(User).filter(User.username == history_request.username).first()
+    result = await db.execute(select(User).where(User.username == history_request.username))
+    user = result.scalar_one_or_none()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -203,27 +383,35 @@ async def get_chat_history(
         )
     
     # Build query for sessions
-    sessions_query = db.query(ChatSession).filter(
+    sessions_query = select(ChatSession).where(
         ChatSession.user_id == user.id,
         ChatSession.is_active == True
     )
     
     # If specific session_id is requested
     if history_request.session_id:
-        sessions_query = sessions_query.filter(
+        sessions_query = sessions_query.where(
             ChatSession.session_id == history_request.session_id
         )
     
-    sessions = sessions_query.order_by(ChatSession.updated_at.desc()).limit(history_request.limit).all()
+    result = await db.execute(
+        sessions_query.order_by(ChatSession.updated_at.desc()).limit(history_request.limit)
+    )
+    sessions = result.scalars().all()
     
-    # Get messages for each session
-    messages_by_session = {}
-    for session in sessions:
-        session_messages = db.query(ChatMessage).filter(
-            ChatMessage.session_id == session.id
-        ).order_by(ChatMessage.created_at.asc()).all()
-        
-        messages_by_session[session.session_id] = session_messages
+    # Get messages for all sessions in one query and group them by session
+    messages_by_session = {session.session_id: [] for session in sessions}
+    public_ids = {session.id: session.session_id for session in sessions}
+    if sessions:
+        result = await db.execute(
+            select(ChatMessage).options(MESSAGE_COLUMNS).where(
+                ChatMessage.session_id.in_(public_ids)
+            ).order_by(
+                ChatMessage.session_id, ChatMessage.created_at.asc(), ChatMessage.id.asc()
+            )
+        )
+        for message in result.scalars():
+            messages_by_session[public_ids[message.session_id]].append(message)
     
     return ChatHistoryResponse(
         sessions=sessions,
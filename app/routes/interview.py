@@ -1,117 +1,219 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import false, func, or_, select, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
 from app.models import User, InterviewQuestion
 from app.schemas import (
-    InterviewQuestionRequest, InterviewQuestionResponse, 
+    InterviewQuestionBase, InterviewQuestionRequest, InterviewQuestionResponse, 
     InterviewQuestionSet
 )
 from app.auth import get_current_active_user
+from app.cache import get_redis, cache_get, cache_set
 from app.services.openai_service import openai_service
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import openai
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-async def generate_interview_questions_with_ai(
-    years_of_experience: int,
-    target_role: str,
-    tech_stack: List[str],
-    focus_areas: List[str],
-    num_questions: int
-) -> List[Dict[str, Any]]:
-    """Generate interview questions using OpenAI based on user profile"""
-    
-    # Determine experience level
-    if years_of_experience <= 2:
-        experience_level = "Junior"
-    elif years_of_experience <= 5:
-        experience_level = "Mid-level"
-    elif years_of_experience <= 10:
-        experience_level = "Senior"
-    else:
-        experience_level = "Lead/Principal"
-    
-    tech_stack_str = ", ".join(tech_stack) if tech_stack else "General software engineering"
-    focus_areas_str = ", ".join(focus_areas) if focus_areas else "General technical and behavioral"
-    
-    system_prompt = f"""
+GENERATED_QUESTIONS_CACHE_TTL = 24 * 60 * 60  # seconds
+
+QUESTION_LIST_ADAPTER = TypeAdapter(List[InterviewQuestionBase])
+
+# Each question is generated by its own completion; at most this many run at once per process
+GENERATION_CONCURRENCY = 8
+_generation_semaphore: Optional[asyncio.Semaphore] = None
+
+# Assigned round-robin so a set mixes question types
+QUESTION_CATEGORIES = ["Technical", "Behavioral", "Coding", "System Design", "Problem Solving"]
+
+# (maximum years of experience, level), checked in order
+EXPERIENCE_LEVELS = [
+    (2, "Junior"),
+    (5, "Mid-level"),
+    (10, "Senior"),
+    (math.inf, "Lead/Principal"),
+]
+
+INTERVIEW_PROMPT_TEMPLATE = """
 You are an expert technical interviewer who creates realistic interview questions for software engineering positions.
 
-Generate exactly {num_questions} interview questions for:
+Generate exactly one {category} interview question, question {position} of a {num_questions}-question set, for:
 - Target Role: {target_role}
 - Experience Level: {experience_level} ({years_of_experience} years)
-- Tech Stack: {tech_stack_str}
-- Focus Areas: {focus_areas_str}
+- Tech Stack: {tech_stack}
+- Focus Areas: {focus_areas}
 
-For each question, provide:
+For the question, provide:
 1. The question text
-2. Category (Technical, System Design, Behavioral, Coding, or Problem Solving)
+2. Category ({category})
 3. Difficulty level appropriate for {experience_level}
 4. A brief expected answer or key points to look for
 
-Questions should be:
+The question should be:
 - Appropriate for the experience level
 - Relevant to the target role and tech stack
-- Mix of technical and behavioral questions
 - Realistic and commonly asked in actual interviews
-- Progressively challenging within the experience level
+- More challenging the later its position in the set
 
-Format your response as a JSON array where each question is an object with these fields:
+Format your response as a JSON object with a single key "questions" holding an array
+with the question as an object with these fields:
 - "question": the question text
-- "category": one of "Technical", "System Design", "Behavioral", "Coding", "Problem Solving"
+- "category": "{category}"
 - "difficulty_level": "{experience_level}"
 - "tech_stack": relevant technology (or null if general)
 - "expected_answer": brief guidance on what to look for in answers
 
 Respond ONLY with valid JSON, no additional text.
 """
+
+def get_generation_semaphore() -> asyncio.Semaphore:
+    """Get the process-wide limit on concurrent question completions
+
+    Created on first use so it binds to the running event loop (Python 3.9).
+    """
+    global _generation_semaphore
+    if _generation_semaphore is None:
+        _generation_semaphore = asyncio.Semaphore(GENERATION_CONCURRENCY)
+    return _generation_semaphore
+
+async def generate_interview_questions_with_ai(
+    years_of_experience: int,
+    target_role: str,
+    tech_stack: List[str],
+    focus_areas: List[str],
+    num_questions: int,
+    redis=None
+) -> List[InterviewQuestionBase]:
+    """Generate interview questions using OpenAI based on user profile
+
+    Each question comes from its own completion and is validated on arrival; failed or
+    invalid ones are dropped. Complete sets are cached in Redis, keyed on the normalized
+    inputs. Raises ValidationError if a cached set no longer matches the question schema.
+    """
     
-    try:
-        response = await openai_service.client.chat.completions.create(
-            model="gpt-4-turbo-preview",
-            messages=[
-                {"role": "system", "content": system_prompt}
-            ],
-            max_tokens=2000,
-            temperature=0.8
+    # Determine experience level
+    experience_level = next(
+        level for max_years, level in EXPERIENCE_LEVELS if years_of_experience <= max_years
+    )
+    
+    cache_key = "interview_questions:" + hashlib.sha256(json.dumps({
+        "level": experience_level,
+        "role": target_role.strip().lower(),
+        "tech": sorted(tech_stack),
+        "focus": sorted(focus_areas),
+        "n": num_questions
+    }, sort_keys=True).encode()).hexdigest()
+    cached = await cache_get(redis, cache_key)
+    if cached is not None:
+        return QUESTION_LIST_ADAPTER.validate_python(cached)
+    
+    tech_stack_str = ", ".join(tech_stack) if tech_stack else "General software engineering"
+    focus_areas_str = ", ".join(focus_areas) if focus_areas else "General technical and behavioral"
+    
+    semaphore = get_generation_semaphore()
+    
+    async def generate_question(index: int) -> InterviewQuestionBase:
+        system_prompt = INTERVIEW_PROMPT_TEMPLATE.format(
+            category=QUESTION_CATEGORIES[index % len(QUESTION_CATEGORIES)],
+            position=index + 1,
+            num_questions=num_questions,
+            target_role=target_role,
+            experience_level=experience_level,
+            years_of_experience=years_of_experience,
+            tech_stack=tech_stack_str,
+            focus_areas=focus_areas_str
         )
-        
-        import json
-        questions_data = json.loads(response.choices[0].message.content)
-        return questions_data
-        
-    except Exception as e:
-        # Fallback questions if AI generation fails
-        fallback_questions = [
-            {
-                "question": f"Tell me about a challenging {tech_stack_str} project you worked on.",
-                "category": "Behavioral",
-                "difficulty_level": experience_level,
-                "tech_stack": tech_stack_str,
-                "expected_answer": "Look for specific examples, problem-solving approach, and lessons learned."
-            },
-            {
-                "question": f"How would you optimize the performance of a {tech_stack_str} application?",
-                "category": "Technical",
-                "difficulty_level": experience_level,
-                "tech_stack": tech_stack_str,
-                "expected_answer": "Performance monitoring, caching strategies, database optimization, code profiling."
-            },
-            {
-                "question": "Describe your approach to code review and maintaining code quality.",
-                "category": "Behavioral",
-                "difficulty_level": experience_level,
-                "tech_stack": None,
-                "expected_answer": "Code standards, testing practices, constructive feedback, knowledge sharing."
-            }
-        ]
-        return fallback_questions[:num_questions]
+        async with semaphore:
+            response = await openai_service.client.chat.completions.create(
+                model="gpt-4-turbo-preview",
+                messages=[
+                    {"role": "system", "content": system_prompt}
+                ],
+                max_tokens=400,
+                temperature=0.8,
+                # JSON mode guarantees parseable output instead of relying on the prompt alone
+                response_format={"type": "json_object"}
+            )
+        choice = response.choices[0]
+        if choice.finish_reason == "length":
+            raise ValueError("completion was cut off at max_tokens")
+        # A refusal or content-filtered reply has no content
+        if choice.message.content is None:
+            raise ValueError("completion has no content")
+        reply = json.loads(choice.message.content)
+        if not isinstance(reply, dict) or not isinstance(reply.get("questions"), list):
+            raise ValueError('reply is not an object with a "questions" list')
+        if not reply["questions"]:
+            raise ValueError("reply contains no question")
+        # One question was asked for; ignore any extras so the set keeps its requested size.
+        # Validated here so a malformed question only drops itself (ValidationError is a ValueError).
+        return QUESTION_LIST_ADAPTER.validate_python(reply["questions"][:1])[0]
+    
+    # Small parallel completions finish much sooner than one long completion for the whole set
+    results = await asyncio.gather(
+        *[generate_question(index) for index in range(num_questions)],
+        return_exceptions=True
+    )
+    
+    questions = []
+    failed = False
+    for result in results:
+        # A failed call or an unusable (truncated, malformed, invalid) reply only drops that question
+        if isinstance(result, (openai.OpenAIError, ValueError, KeyError)):
+            logger.warning(f"Interview question generation failed: {result!r}")
+            failed = True
+        elif isinstance(result, BaseException):
+            raise result
+        else:
+            questions.append(result)
+    
+    if questions:
+        if not failed:
+            await cache_set(redis, cache_key, questions, GENERATED_QUESTIONS_CACHE_TTL)
+        return questions
+    
+    # Fallback questions if the OpenAI requests fail
+    fallback_questions = [
+        {
+            "question": f"Tell me about a challenging {tech_stack_str} project you worked on.",
+            "category": "Behavioral",
+            "difficulty_level": experience_level,
+            "tech_stack": tech_stack_str,
+            "expected_answer": "Look for specific examples, problem-solving approach, and lessons learned."
+        },
+        {
+            "question": f"How would you optimize the performance of a {tech_stack_str} application?",
+            "category": "Technical",
+            "difficulty_level": experience_level,
+            "tech_stack": tech_stack_str,
+            "expected_answer": "Performance monitoring, caching strategies, database optimization, code profiling."
+        },
+        {
+            "question": "Describe your approach to code review and maintaining code quality.",
+            "category": "Behavioral",
+            "difficulty_level": experience_level,
+            "tech_stack": None,
+            "expected_answer": "Code standards, testing practices, constructive feedback, knowledge sharing."
+        }
+    ]
+    return QUESTION_LIST_ADAPTER.validate_python(fallback_questions[:num_questions])
 
 @router.post("/generate", response_model=InterviewQuestionSet)
 async def generate_interview_questions(
     request: InterviewQuestionRequest,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    redis = Depends(get_redis)
 ):
     """Generate interview questions based on user profile and requirements"""
     
@@ -121,37 +223,51 @@ async def generate_interview_questions(
     # If no focus areas specified, use user's tech stack
     focus_areas = request.focus_areas if request.focus_areas else user_tech_stack[:5]
     
+    # End the read transaction so the connection returns to the pool during the OpenAI call
+    await db.commit()
+    
     # Generate questions using AI
-    questions_data = await generate_interview_questions_with_ai(
-        years_of_experience=request.years_of_experience,
-        target_role=request.target_role,
-        tech_stack=user_tech_stack,
-        focus_areas=focus_areas,
-        num_questions=request.num_questions
-    )
+    try:
+        questions_data = await generate_interview_questions_with_ai(
+            years_of_experience=request.years_of_experience,
+            target_role=request.target_role,
+            tech_stack=user_tech_stack,
+            focus_areas=focus_areas,
+            num_questions=request.num_questions,
+            redis=redis
+        )
+    except ValidationError:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail="AI service returned malformed interview questions"
+        )
     
-    # Save generated questions to database
-    generated_questions = []
-    for q_data in questions_data:
-        # Check if similar question already exists
-        existing = db.query(InterviewQuestion).filter(
-            InterviewQuestion.question == q_data["question"]
-        ).first()
+    # Save generated questions to database in one statement; questions that
+    # already exist are skipped by the unique constraint and fetched afterwards
+    questions_by_text = {}
+    if questions_data:
+        result = await db.scalars(
+            pg_insert(InterviewQuestion).values([
+                q_data.model_dump() for q_data in questions_data
+            ]).on_conflict_do_nothing(index_elements=["question"]).returning(InterviewQuestion)
+        )
+        questions_by_text = {question.question: question for question in result}
         
-        if not existing:
-            interview_question = InterviewQuestion(
-                question=q_data["question"],
-                category=q_data["category"],
-                difficulty_level=q_data["difficulty_level"],
-                tech_stack=q_data.get("tech_stack"),
-                expected_answer=q_data.get("expected_answer")
+        missing = [q_data.question for q_data in questions_data
+                   if q_data.question not in questions_by_text]
+        if missing:
+            result = await db.scalars(
+                select(InterviewQuestion).where(InterviewQuestion.question.in_(missing))
             )
-            db.add(interview_question)
-            db.commit()
-            db.refresh(interview_question)
-            generated_questions.append(interview_question)
-        else:
-            generated_questions.append(existing)
+            questions_by_text.update((question.question, question) for question in result)
+        await db.commit()
+    
+    # Keep the generated order, without duplicates
+    generated_questions = [
+        questions_by_text.pop(q_data.question)
+        for q_data in questions_data
+        if q_data.question in questions_by_text
+    ]
     
     user_context = {
         "years_of_experience": request.years_of_experience,
@@ -173,39 +289,58 @@ async def get_saved_interview_questions(
     difficulty_level: str = None,
     tech_stack: str = None,
     limit: int = 20,
-    db: Session = Depends(get_db)
+    before: Optional[datetime] = None,
+    before_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_db)
 ):
-    """Get saved interview questions with optional filters"""
+    """Get saved interview questions with optional filters, newest first
+
+    To fetch the next page, pass the `created_at` and `id` of the last question
+    received as `before` and `before_id`.
+    """
     
-    query = db.query(InterviewQuestion)
+    query = select(InterviewQuestion)
+    
+    # Keyset pagination: id breaks ties between questions saved in the same statement
+    if before is not None and before_id is not None:
+        query = query.where(
+            tuple_(InterviewQuestion.created_at, InterviewQuestion.id) < tuple_(before, before_id)
+        )
+    elif before is not None:
+        query = query.where(InterviewQuestion.created_at < before)
     
     if category:
-        query = query.filter(InterviewQuestion.category == category)
+        query = query.where(InterviewQuestion.category == category)
     if difficulty_level:
-        query = query.filter(InterviewQuestion.difficulty_level == difficulty_level)
+        query = query.where(InterviewQuestion.difficulty_level == difficulty_level)
     if tech_stack:
-        query = query.filter(InterviewQuestion.tech_stack.contains(tech_stack))
+        query = query.where(InterviewQuestion.tech_stack.contains(tech_stack))
     
-    questions = query.order_by(InterviewQuestion.created_at.desc()).limit(limit).all()
+    result = await db.execute(
+        query.order_by(InterviewQuestion.created_at.desc(), InterviewQuestion.id.desc()).limit(limit)
+    )
+    questions = result.scalars().all()
     return questions
 
 @router.get("/categories")
-async def get_question_categories(db: Session = Depends(get_db)):
+async def get_question_categories(db: AsyncSession = Depends(get_db)):
     """Get all available question categories"""
-    categories = db.query(InterviewQuestion.category).distinct().all()
-    return {"categories": [cat[0] for cat in categories if cat[0]]}
+    result = await db.execute(select(InterviewQuestion.category).distinct())
+    categories = result.scalars().all()
+    return {"categories": [cat for cat in categories if cat]}
 
 @router.get("/difficulty-levels")
 async def get_difficulty_levels():
     """Get all available difficulty levels"""
     return {
-        "difficulty_levels": ["Junior", "Mid-level", "Senior", "Lead/Principal"]
+        "difficulty_levels": [level for _, level in EXPERIENCE_LEVELS]
     }
 
 @router.post("/practice-set")
 async def generate_practice_interview_set(
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    redis = Depends(get_redis)
 ):
     """Generate a practice interview set based on user's current profile"""
     
@@ -220,40 +355,45 @@ async def generate_practice_interview_set(
         num_questions=10
     )
     
-    return await generate_interview_questions(request, current_user, db)
+    return await generate_interview_questions(request, current_user, db, redis)
 
 @router.get("/stats")
 async def get_interview_question_stats(
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get statistics about available interview questions"""
     
-    total_questions = db.query(InterviewQuestion).count()
-    
-    categories_count = db.query(
-        InterviewQuestion.category, 
-        db.func.count(InterviewQuestion.id)
-    ).group_by(InterviewQuestion.category).all()
+    user_tech_names = [tech.name for tech in current_user.tech_stacks]
+    relevant_filter = (
+        or_(*[InterviewQuestion.tech_stack.contains(tech) for tech in user_tech_names])
+        if user_tech_names else false()
+    )
     
-    difficulty_count = db.query(
-        InterviewQuestion.difficulty_level,
-        db.func.count(InterviewQuestion.id)
-    ).group_by(InterviewQuestion.difficulty_level).all()
+    # Totals and both breakdowns in a single round-trip
+    by_category = select(
+        InterviewQuestion.category.label("name"), func.count().label("count")
+    ).group_by(InterviewQuestion.category).cte("by_category")
+    by_difficulty = select(
+        InterviewQuestion.difficulty_level.label("name"), func.count().label("count")
+    ).group_by(InterviewQuestion.difficulty_level).cte("by_difficulty")
     
-    user_tech_count = 0
-    if current_user.tech_stacks:
-        user_tech_names = [tech.name for tech in current_user.tech_stacks]
-        for tech in user_tech_names:
-            count = db.query(InterviewQuestion).filter(
-                InterviewQuestion.tech_stack.contains(tech)
-            ).count()
-            user_tech_count += count
+    result = await db.execute(
+        select(
+            func.count(InterviewQuestion.id).label("total"),
+            func.count(InterviewQuestion.id).filter(relevant_filter).label("relevant"),
+            select(func.json_object_agg(by_category.c.name, by_category.c.count))
+                .scalar_subquery().label("categories"),
+            select(func.json_object_agg(by_difficulty.c.name, by_difficulty.c.count))
+                .scalar_subquery().label("difficulty_levels")
+        )
+    )
+    stats = result.one()
     
     return {
-        "total_questions": total_questions,
-        "categories": dict(categories_count),
-        "difficulty_levels": dict(difficulty_count),
-        "relevant_to_user_tech_stack": user_tech_count,
-        "user_tech_stack": [tech.name for tech in current_user.tech_stacks]
+        "total_questions": stats.total,
+        "categories": stats.categories or {},
+        "difficulty_levels": stats.difficulty_levels or {},
+        "relevant_to_user_tech_stack": stats.relevant,
+        "user_tech_stack": user_tech_names
     }
\ No newline at end of file
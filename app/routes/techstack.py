@@ -1,8 +1,10 @@
-from typing import List
+from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
-from app.models import User, TechStack
+from app.models import User, TechStack, user_techstacks
 from app.schemas import TechStackResponse, TechStackCreate, TechStackUpdate
 from app.auth import get_current_active_user
 
@@ -11,40 +13,49 @@ router = APIRouter()
 @router.get("/available", response_model=List[TechStackResponse])
 async def get_available_tech_stacks(
     category: str = None,
-    db: Session = Depends(get_db)
+    limit: int = 100,
+    after_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_db)
 ):
-    """Get all available tech stacks, optionally filtered by category"""
-    query = db.query(TechStack)
+    """Get available tech stacks, optionally filtered by category
+
+    Results are ordered by id; pass the last id received as `after_id` for the next page.
+    """
+    query = select(TechStack)
     if category:
-        query = query.filter(TechStack.category == category)
+        query = query.where(TechStack.category == category)
+    if after_id is not None:
+        query = query.where(TechStack.id > after_id)
     
-    tech_stacks = query.all()
+    result = await db.execute(query.order_by(TechStack.id).limit(limit))
+    tech_stacks = result.scalars().all()
     return tech_stacks
 
 @router.get("/categories")
-async def get_tech_stack_categories(db: Session = Depends(get_db)):
+async def get_tech_stack_categories(db: AsyncSession = Depends(get_db)):
     """Get all available tech stack categories"""
-    categories = db.query(TechStack.category).distinct().all()
-    return {"categories": [cat[0] for cat in categories]}
+    result = await db.execute(select(TechStack.category).distinct())
+    return {"categories": result.scalars().all()}
 
 @router.post("/create", response_model=TechStackResponse)
 async def create_tech_stack(
     tech_stack: TechStackCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a new tech stack (admin function)"""
     # Check if tech stack already exists
-    existing = db.query(TechStack).filter(TechStack.name == tech_stack.name).first()
+    result = await db.execute(select(TechStack).where(TechStack.name == tech_stack.name))
+    existing = result.scalar_one_or_none()
     if existing:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Tech stack already exists"
         )
     
-    db_tech_stack = TechStack(**tech_stack.dict())
+    db_tech_stack = TechStack(**tech_stack.model_dump())
     db.add(db_tech_stack)
-    db.commit()
-    db.refresh(db_tech_stack)
+    await db.commit()
+    await db.refresh(db_tech_stack)
     
     return db_tech_stack
 
@@ -59,13 +70,16 @@ async def get_user_tech_stack(
 async def update_user_tech_stack(
     tech_stack_update: TechStackUpdate,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update current user's tech stack"""
     # Get tech stacks by IDs
-    tech_stacks = db.query(TechStack).filter(
-        TechStack.id.in_(tech_stack_update.tech_stack_ids)
-    ).all()
+    result = await db.execute(
+        select(TechStack).where(
+            TechStack.id.in_(tech_stack_update.tech_stack_ids)
+        )
+    )
+    tech_stacks = result.scalars().all()
     
     if len(tech_stacks) != len(tech_stack_update.tech_stack_ids):
         raise HTTPException(
@@ -73,9 +87,26 @@ async def update_user_tech_stack(
             detail="Some tech stack IDs are invalid"
         )
     
-    # Update user's tech stacks
-    current_user.tech_stacks = tech_stacks
-    db.commit()
+    # Update user's tech stacks: drop the links no longer wanted and add the new ones,
+    # leaving unchanged links in place
+    requested_ids = {tech_stack.id for tech_stack in tech_stacks}
+    links = user_techstacks.c
+    await db.execute(
+        delete(user_techstacks).where(
+            links.user_id == current_user.id,
+            links.techstack_id.not_in(requested_ids)
+        )
+    )
+    if requested_ids:
+        await db.execute(
+            pg_insert(user_techstacks)
+            .values([
+                {"user_id": current_user.id, "techstack_id": tech_stack_id}
+                for tech_stack_id in requested_ids
+            ])
+            .on_conflict_do_nothing()
+        )
+    await db.commit()
     
     return {
         "message": "Tech stack updated successfully",
@@ -86,24 +117,28 @@ async def update_user_tech_stack(
 async def remove_tech_stack_from_user(
     tech_stack_id: int,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Remove a tech stack from current user"""
-    # Find the tech stack
-    tech_stack = db.query(TechStack).filter(TechStack.id == tech_stack_id).first()
-    if not tech_stack:
+    links = user_techstacks.c
+    result = await db.execute(
+        delete(user_techstacks).where(
+            links.user_id == current_user.id,
+            links.techstack_id == tech_stack_id
+        )
+    )
+    if result.rowcount:
+        await db.commit()
+        return {"message": "Tech stack removed successfully"}
+    
+    # Nothing was removed; tell an unknown tech stack apart from one the user doesn't have
+    tech_stack_exists = await db.scalar(select(TechStack.id).where(TechStack.id == tech_stack_id))
+    if tech_stack_exists is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Tech stack not found"
         )
-    
-    # Remove from user's tech stacks
-    if tech_stack in current_user.tech_stacks:
-        current_user.tech_stacks.remove(tech_stack)
-        db.commit()
-        return {"message": "Tech stack removed successfully"}
-    else:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Tech stack not in user's stack"
-        )
\ No newline at end of file
+    raise HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Tech stack not in user's stack"
+    )
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, ConfigDict, EmailStr, Field
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 
@@ -21,8 +21,7 @@ class UserResponse(UserBase):
     created_at: datetime
     tech_stacks: List["TechStackResponse"] = []
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class UserUpdate(BaseModel):
     full_name: Optional[str] = None
@@ -54,8 +53,7 @@ class TechStackResponse(TechStackBase):
     id: int
     created_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class TechStackUpdate(BaseModel):
     tech_stack_ids: List[int]
@@ -75,8 +73,7 @@ class ChatSessionResponse(ChatSessionBase):
     created_at: datetime
     updated_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class ChatMessageBase(BaseModel):
     content: str
@@ -92,8 +89,7 @@ class ChatMessageResponse(ChatMessageBase):
     tech_context: Optional[Dict[str, Any]] = None
     created_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class ChatResponse(BaseModel):
     message: str
@@ -112,8 +108,7 @@ class InterviewQuestionResponse(InterviewQuestionBase):
     id: int
     created_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class InterviewQuestionRequest(BaseModel):
     years_of_experience: int = Field(..., ge=0, le=50)
@@ -0,0 +1 @@
+# This makes the scripts directory a Python package
\ No newline at end of file
@@ -0,0 +1,263 @@
+"""
+Database initialization script
+This script creates the database tables and populates initial data
+
+Run from the project root with: python -m app.scripts.init_db
+"""
+
+import argparse
+
+# SQLAlchemy and the app modules are imported where they are used, so --help and
+# argument errors return without loading them (or needing the app settings)
+
+# Rows per multi-row INSERT: large enough to amortize round-trips, small enough
+# to stay far below the driver's bind parameter limit as the seed list grows
+DEFAULT_BATCH_SIZE = 50
+
+# Seed tech stacks as (name, category, description) rows, the shape COPY and
+# a VALUES list take directly
+SEED_COLUMNS = ("name", "category", "description")
+TECH_STACKS = (
+    # Programming Languages
+    ("Python", "Programming Language", "High-level programming language for general-purpose programming"),
+    ("JavaScript", "Programming Language", "Dynamic programming language for web development"),
+    ("TypeScript", "Programming Language", "Typed superset of JavaScript"),
+    ("Java", "Programming Language", "Object-oriented programming language"),
+    ("C#", "Programming Language", "Microsoft's object-oriented programming language"),
+    ("C++", "Programming Language", "General-purpose programming language"),
+    ("Go", "Programming Language", "Programming language developed by Google"),
+    ("Rust", "Programming Language", "Systems programming language focused on safety"),
+    ("Ruby", "Programming Language", "Dynamic programming language"),
+    ("PHP", "Programming Language", "Server-side scripting language"),
+    ("Swift", "Programming Language", "Apple's programming language for iOS/macOS"),
+    ("Kotlin", "Programming Language", "JVM programming language by JetBrains"),
+    
+    # Web Frameworks
+    ("React", "Frontend Framework", "JavaScript library for building user interfaces"),
+    ("Angular", "Frontend Framework", "TypeScript-based web application framework"),
+    ("Vue.js", "Frontend Framework", "Progressive JavaScript framework"),
+    ("Svelte", "Frontend Framework", "Compile-time web framework"),
+    ("Next.js", "Frontend Framework", "React framework for production"),
+    
+    # Backend Frameworks
+    ("Node.js", "Backend Framework", "JavaScript runtime for server-side development"),
+    ("Express.js", "Backend Framework", "Fast web framework for Node.js"),
+    ("FastAPI", "Backend Framework", "Modern Python web framework"),
+    ("Django", "Backend Framework", "High-level Python web framework"),
+    ("Flask", "Backend Framework", "Lightweight Python web framework"),
+    ("Spring Boot", "Backend Framework", "Java framework for building applications"),
+    ("ASP.NET Core", "Backend Framework", "Microsoft's web framework"),
+    ("Ruby on Rails", "Backend Framework", "Ruby web framework"),
+    
+    # Databases
+    ("PostgreSQL", "Database", "Advanced open-source relational database"),
+    ("MySQL", "Database", "Popular open-source relational database"),
+    ("MongoDB", "Database", "Document-oriented NoSQL database"),
+    ("Redis", "Database", "In-memory data structure store"),
+    ("SQLite", "Database", "Lightweight relational database"),
+    ("Cassandra", "Database", "Distributed NoSQL database"),
+    ("Elasticsearch", "Database", "Search and analytics engine"),
+    
+    # Cloud Platforms
+    ("AWS", "Cloud Platform", "Amazon Web Services"),
+    ("Google Cloud", "Cloud Platform", "Google Cloud Platform"),
+    ("Azure", "Cloud Platform", "Microsoft Azure"),
+    ("Heroku", "Cloud Platform", "Platform as a service"),
+    ("Vercel", "Cloud Platform", "Frontend deployment platform"),
+    
+    # DevOps Tools
+    ("Docker", "DevOps", "Containerization platform"),
+    ("Kubernetes", "DevOps", "Container orchestration platform"),
+    ("Jenkins", "DevOps", "Automation server for CI/CD"),
+    ("GitHub Actions", "DevOps", "CI/CD platform by GitHub"),
+    ("Terraform", "DevOps", "Infrastructure as code tool"),
+    ("Ansible", "DevOps", "Configuration management tool"),
+    
+    # Mobile Development
+    ("React Native", "Mobile Framework", "Cross-platform mobile development"),
+    ("Flutter", "Mobile Framework", "Google's UI toolkit for mobile"),
+    ("Ionic", "Mobile Framework", "Hybrid mobile app framework"),
+    ("Xamarin", "Mobile Framework", "Microsoft's cross-platform framework"),
+    
+    # Testing
+    ("Jest", "Testing", "JavaScript testing framework"),
+    ("Pytest", "Testing", "Python testing framework"),
+    ("JUnit", "Testing", "Java testing framework"),
+    ("Cypress", "Testing", "End-to-end testing framework"),
+    ("Selenium", "Testing", "Web application testing framework"),
+    
+    # Tools
+    ("Git", "Version Control", "Distributed version control system"),
+    ("GitHub", "Version Control", "Git repository hosting service"),
+    ("GitLab", "Version Control", "DevOps platform with Git repository"),
+    ("Jira", "Project Management", "Issue tracking and project management"),
+    ("Confluence", "Documentation", "Team collaboration software"),
+    
+    # AI/ML
+    ("TensorFlow", "Machine Learning", "Machine learning platform"),
+    ("PyTorch", "Machine Learning", "Machine learning library"),
+    ("Scikit-learn", "Machine Learning", "Machine learning library for Python"),
+    ("OpenAI API", "AI/ML", "API for AI language models"),
+    ("Hugging Face", "AI/ML", "Platform for machine learning models"),
+)
+
+def create_tables(conn):
+    """Create all database tables"""
+    from sqlalchemy import text
+    from sqlalchemy.schema import CreateIndex, CreateTable
+    from app.database import Base
+    import app.models  # registers the tables on Base.metadata
+    
+    print("Creating database tables...")
+    # On a warm database everything exists already; check with one catalog lookup and
+    # skip the DDL, which would otherwise lock each live table while it re-checks
+    tables = Base.metadata.sorted_tables
+    names = [table.name for table in tables] + [index.name for table in tables for index in table.indexes]
+    missing = conn.execute(
+        text("SELECT name FROM unnest(CAST(:names AS text[])) AS name WHERE to_regclass(name) IS NULL"),
+        {"names": names}
+    ).scalars().all()
+    if not missing:
+        print("✓ Tables already exist")
+        return
+    
+    # Render the whole schema up front and send it as one script, instead of an
+    # existence check and CREATE round-trip per table and index
+    statements = []
+    for table in tables:
+        statements.append(CreateTable(table, if_not_exists=True))
+        statements.extend(CreateIndex(index, if_not_exists=True) for index in table.indexes)
+    conn.exec_driver_sql(";\n".join(str(statement.compile(dialect=conn.dialect)) for statement in statements))
+    print("✓ Tables created successfully")
+
+def enable_pgvector(conn):
+    """Enable pgvector extension in PostgreSQL"""
+    from sqlalchemy import text
+    
+    try:
+        # A savepoint keeps a failure here from aborting the rest of the transaction
+        with conn.begin_nested():
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector;"))
+        print("✓ pgvector extension enabled")
+    except Exception as e:
+        print(f"Warning: Could not enable pgvector extension: {e}")
+        print("Make sure PostgreSQL has the pgvector extension installed")
+
+def enable_pg_trgm(conn):
+    """Enable pg_trgm extension in PostgreSQL"""
+    from sqlalchemy import text
+    
+    try:
+        with conn.begin_nested():
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm;"))
+        print("✓ pg_trgm extension enabled")
+    except Exception as e:
+        print(f"Warning: Could not enable pg_trgm extension: {e}")
+        print("Make sure PostgreSQL has the contrib extensions installed")
+
+def copy_tech_stacks(conn, rows):
+    """Load tech stacks with COPY, skipping names that already exist; returns the number added
+
+    COPY cannot skip conflicting rows itself, so the rows are copied into a
+    temporary table and moved over with INSERT ... ON CONFLICT DO NOTHING.
+    Runs in the caller's transaction.
+    """
+    connection = conn.connection.driver_connection
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "CREATE TEMP TABLE techstacks_seed (name text, category text, description text) "
+            "ON COMMIT DROP"
+        )
+        with cursor.copy("COPY techstacks_seed (name, category, description) FROM STDIN") as copy:
+            for row in rows:
+                copy.write_row(row)
+        cursor.execute(
+            "INSERT INTO techstacks (name, category, description) "
+            "SELECT name, category, description FROM techstacks_seed "
+            "ON CONFLICT (name) DO NOTHING"
+        )
+        return cursor.rowcount
+
+def populate_tech_stacks(conn, batch_size=DEFAULT_BATCH_SIZE):
+    """Populate initial tech stack data"""
+    from sqlalchemy import String, column, func, insert, select, values
+    from app.models import TechStack
+    
+    print("Populating tech stacks...")
+    
+    # Re-runs (every deploy's release step) usually find the seed complete; one
+    # count then replaces the load
+    seed_names = [row[0] for row in TECH_STACKS]
+    existing_count = conn.scalar(
+        select(func.count()).select_from(TechStack).where(TechStack.name.in_(seed_names))
+    )
+    if existing_count == len(seed_names):
+        print("✓ Tech stacks already present")
+        return
+    
+    if conn.dialect.driver == "psycopg":
+        added_count = copy_tech_stacks(conn, TECH_STACKS)
+    else:
+        # INSERT ... SELECT from a VALUES list of batch_size rows, keeping only names
+        # not in the table yet; RETURNING reports what was actually added
+        added_count = 0
+        for start in range(0, len(TECH_STACKS), batch_size):
+            batch = values(
+                *(column(name, String) for name in SEED_COLUMNS), name="seed"
+            ).data(TECH_STACKS[start:start + batch_size])
+            result = conn.execute(
+                insert(TechStack)
+                .from_select(
+                    SEED_COLUMNS,
+                    select(batch).where(batch.c.name.not_in(select(TechStack.name)))
+                )
+                .returning(TechStack.name)
+            )
+            added_count += len(result.all())
+    
+    print(f"✓ Added {added_count} tech stacks to database")
+
+def main():
+    parser = argparse.ArgumentParser(description="Create the database tables and seed data")
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help=f"rows per INSERT statement when COPY is unavailable (default: {DEFAULT_BATCH_SIZE})"
+    )
+    args = parser.parse_args()
+    if args.batch_size < 1:
+        parser.error("--batch-size must be at least 1")
+    
+    print("Initializing database...")
+    
+    try:
+        from sqlalchemy import create_engine, text
+        from sqlalchemy.pool import NullPool
+        from app.database import get_database_url
+        
+        # The application engine is async; this one-off script uses a synchronous engine.
+        # It only ever needs one connection, so skip pooling and close it when done.
+        engine = create_engine(get_database_url(), poolclass=NullPool)
+        
+        # One connection and one transaction for the whole bootstrap
+        with engine.begin() as conn:
+            # An interrupted bootstrap is simply rerun, so don't wait for the WAL flush at commit
+            conn.execute(text("SET LOCAL synchronous_commit = off"))
+            enable_pgvector(conn)
+            enable_pg_trgm(conn)
+            create_tables(conn)
+            populate_tech_stacks(conn, args.batch_size)
+        
+        print("\n✅ Database initialization completed successfully!")
+        print("\nYou can now start the application with:")
+        print("uvicorn app.main:app --reload")
+        
+    except Exception as e:
+        print(f"\n❌ Error during initialization: {e}")
+        return 1
+    
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
\ No newline at end of file
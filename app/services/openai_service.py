@@ -1,19 +1,110 @@
 import openai
+import asyncio
+import json
 import logging
-from typing import List, Dict, Any, Optional
+import re
+from cachetools import LRUCache
+from typing import AsyncIterator, List, Dict, Any, Optional
+from pgvector.sqlalchemy import HALFVEC
+from sqlalchemy import cast, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import defer
 from app.config import settings
+from app.models import ChatMessage, ChatSession
 
 logger = logging.getLogger(__name__)
 
 # Initialize OpenAI client
 openai.api_key = settings.openai_api_key
 
+# The chat model replies with exactly this marker for off-topic queries, which
+# saves a separate classifier round-trip before every chat completion
+OFF_TOPIC_SENTINEL = "<OFFTOPIC>"
+OFF_TOPIC_RESPONSE = (
+    "I'm a specialized chatbot for software engineering topics. "
+    "I can help with programming languages, frameworks, system design, "
+    "debugging, career advice for developers, and other software engineering topics. "
+    "Please ask me something related to software development!"
+)
+
+CHAT_ERROR_RESPONSE = (
+    "I'm experiencing some technical difficulties right now. "
+    "Please try again in a moment, or rephrase your question."
+)
+
+# Queries mentioning any of these are clearly on topic and skip the classifier call
+TECH_KEYWORDS_RE = re.compile(
+    r"(?<!\w)(python|javascript|typescript|golang|c\+\+|c#|php|kotlin|"
+    r"react|angular|django|flask|fastapi|node\.js|sql|postgres(?:ql)?|mysql|"
+    r"mongodb|redis|docker|kubernetes|k8s|terraform|aws|gcp|linux|git|api|graphql|"
+    r"async|algorithms?|data structures?|debug(?:ging)?|refactor(?:ing)?|unit tests?|ci/cd|"
+    r"microservices?|system design|compiler|frontend|backend|devops)(?!\w)",
+    re.IGNORECASE
+)
+CLASSIFIER_CACHE_SIZE = 10_000
+# Label the local topic model predicts for software engineering queries
+TOPIC_CLASSIFIER_LABEL = "__label__se"
+
+EMBEDDING_MODEL = "text-embedding-ada-002"
+
+# Batch jobs end in one of these states; only "completed" has an output file
+BATCH_FINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+# Shared by the regular and streaming chat completions
+CHAT_COMPLETION_PARAMS = {
+    "model": "gpt-4-turbo-preview",
+    "max_tokens": 1000,
+    "temperature": 0.7,
+    "presence_penalty": 0.1,
+    "frequency_penalty": 0.1,
+}
+
 class OpenAIService:
     def __init__(self):
-        self.client = openai.OpenAI(api_key=settings.openai_api_key)
+        # One client per process; it keeps a pooled HTTP connection to the API.
+        # The async client lets concurrent requests overlap instead of blocking the event loop.
+        self.client = openai.AsyncOpenAI(api_key=settings.openai_api_key)
+        # Normalized query -> topic classifier answer
+        self.classifier_cache = LRUCache(maxsize=CLASSIFIER_CACHE_SIZE)
+        self.topic_classifier = self._load_topic_classifier(settings.topic_classifier_path)
+    
+    @staticmethod
+    def _load_topic_classifier(path: Optional[str]):
+        """Load the optional local fastText topic model, or return None to use the API"""
+        if not path:
+            return None
+        try:
+            # Imported here so fasttext is only needed when a model is configured
+            import fasttext
+            return fasttext.load_model(path)
+        except Exception as e:
+            logger.warning(f"Local topic classifier unavailable, using the API: {e}")
+            return None
+    
+    async def close(self):
+        """Close the pooled HTTP connections held by the client"""
+        await self.client.close()
     
     async def is_software_engineering_query(self, query: str) -> bool:
-        """Check if the query is related to software engineering"""
+        """Check if the query is related to software engineering
+
+        Queries naming common technologies are accepted without an API call. The rest
+        go to the local topic model when one is configured (no network round-trip),
+        otherwise to the API, with answers cached per normalized query.
+        """
+        if TECH_KEYWORDS_RE.search(query):
+            return True
+        
+        if self.topic_classifier is not None:
+            # fastText predicts a single line at a time
+            labels, _ = self.topic_classifier.predict(" ".join(query.split()))
+            return bool(labels) and labels[0] == TOPIC_CLASSIFIER_LABEL
+        
+        cache_key = " ".join(query.lower().split())
+        cached = self.classifier_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         system_prompt = """
         You are a classifier that determines if a query is related to software engineering.
         Software engineering topics include: programming languages, frameworks, databases, 
@@ -27,7 +118,7 @@ class OpenAIService:
         """
         
         try:
-            response = self.client.chat.completions.create(
+            response = await self.client.chat.completions.create(
                 model="gpt-3.5-turbo",
                 messages=[
                     {"role": "system", "content": system_prompt},
@@ -37,27 +128,21 @@ class OpenAIService:
                 temperature=0
             )
             
-            answer = response.choices[0].message.content.strip().upper()
-            return answer == "YES"
+            answer = response.choices[0].message.content.strip().upper() == "YES"
+            self.classifier_cache[cache_key] = answer
+            return answer
         except Exception as e:
             logger.error(f"Error checking if query is software engineering related: {e}")
             # If we can't determine, err on the side of caution and allow it
             return True
     
-    async def generate_chat_response(
-        self, 
-        query: str, 
-        user_tech_stack: List[Dict[str, Any]], 
+    def _build_chat_messages(
+        self,
+        query: str,
+        user_tech_stack: List[Dict[str, Any]],
         chat_history: List[Dict[str, str]] = None
-    ) -> str:
-        """Generate a chat response based on user query and tech stack context"""
-        
-        # First check if the query is software engineering related
-        if not await self.is_software_engineering_query(query):
-            return ("I'm a specialized chatbot for software engineering topics. "
-                   "I can help with programming languages, frameworks, system design, "
-                   "debugging, career advice for developers, and other software engineering topics. "
-                   "Please ask me something related to software development!")
+    ) -> List[Dict[str, str]]:
+        """Build the system prompt and conversation for a chat completion"""
         
         # Build context from user's tech stack
         tech_context = ""
@@ -86,7 +171,7 @@ with technical questions, debugging, best practices, and career advice.
 
 IMPORTANT RULES:
 1. Only answer questions related to software engineering, programming, and technology
-2. If asked about non-technical topics, politely redirect to software engineering topics
+2. If the user's question is not about software engineering, respond with exactly: {OFF_TOPIC_SENTINEL}
 3. Provide practical, actionable advice
 4. Consider the user's tech stack when giving recommendations
 5. Be concise but comprehensive
@@ -115,28 +200,81 @@ When providing answers:
                 })
         
         messages.append({"role": "user", "content": query})
+        return messages
+    
+    async def generate_chat_response(
+        self, 
+        query: str, 
+        user_tech_stack: List[Dict[str, Any]], 
+        chat_history: List[Dict[str, str]] = None
+    ) -> str:
+        """Generate a chat response based on user query and tech stack context"""
+        messages = self._build_chat_messages(query, user_tech_stack, chat_history)
         
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4-turbo-preview",
+            response = await self.client.chat.completions.create(
                 messages=messages,
-                max_tokens=1000,
-                temperature=0.7,
-                presence_penalty=0.1,
-                frequency_penalty=0.1
+                **CHAT_COMPLETION_PARAMS
             )
             
-            return response.choices[0].message.content
+            content = response.choices[0].message.content
+            if content.strip().startswith(OFF_TOPIC_SENTINEL):
+                return OFF_TOPIC_RESPONSE
+            return content
         except Exception as e:
             logger.error(f"Error generating chat response: {e}")
-            return ("I'm experiencing some technical difficulties right now. "
-                   "Please try again in a moment, or rephrase your question.")
+            return CHAT_ERROR_RESPONSE
+    
+    async def generate_chat_response_stream(
+        self,
+        query: str,
+        user_tech_stack: List[Dict[str, Any]],
+        chat_history: List[Dict[str, str]] = None
+    ) -> AsyncIterator[str]:
+        """Stream a chat response as text chunks while the model generates it"""
+        messages = self._build_chat_messages(query, user_tech_stack, chat_history)
+        
+        # Hold back the opening text until it can't be the off-topic sentinel
+        pending = ""
+        sent_any = False
+        try:
+            stream = await self.client.chat.completions.create(
+                messages=messages,
+                stream=True,
+                **CHAT_COMPLETION_PARAMS
+            )
+            async with stream:
+                async for chunk in stream:
+                    if not chunk.choices or not chunk.choices[0].delta.content:
+                        continue
+                    text = chunk.choices[0].delta.content
+                    if sent_any:
+                        yield text
+                        continue
+                    
+                    pending += text
+                    opening = pending.lstrip()
+                    if opening.startswith(OFF_TOPIC_SENTINEL):
+                        yield OFF_TOPIC_RESPONSE
+                        return
+                    if len(opening) >= len(OFF_TOPIC_SENTINEL) or not OFF_TOPIC_SENTINEL.startswith(opening):
+                        sent_any = True
+                        yield pending
+            
+            if not sent_any and pending:
+                yield pending
+        except Exception as e:
+            logger.error(f"Error streaming chat response: {e}")
+            if sent_any:
+                # Part of the reply is already out; let the caller handle the cut-off
+                raise
+            yield CHAT_ERROR_RESPONSE
     
     async def generate_embeddings(self, text: str) -> List[float]:
         """Generate embeddings for text using OpenAI's embedding model"""
         try:
-            response = self.client.embeddings.create(
-                model="text-embedding-ada-002",
+            response = await self.client.embeddings.create(
+                model=EMBEDDING_MODEL,
                 input=text
             )
             
@@ -145,34 +283,110 @@ When providing answers:
             logger.error(f"Error generating embeddings: {e}")
             return []
     
+    async def generate_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
+        """Generate embeddings for several texts in a single API call"""
+        try:
+            response = await self.client.embeddings.create(
+                model=EMBEDDING_MODEL,
+                input=texts
+            )
+            
+            # Results carry the index of their input; keep the input order
+            return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+        except Exception as e:
+            logger.error(f"Error generating embeddings: {e}")
+            return [[] for _ in texts]
+    
+    async def generate_embeddings_bulk(
+        self,
+        texts: List[str],
+        poll_interval: float = 30.0
+    ) -> List[List[float]]:
+        """Generate embeddings for many texts through the OpenAI Batch API
+
+        Batch jobs cost half as much and have separate rate limits, but can take
+        up to 24 hours; use this for offline jobs such as re-indexing chat history
+        and `generate_embeddings_batch` for anything a user is waiting on.
+        Texts that could not be embedded get an empty list.
+        """
+        embeddings = [[] for _ in texts]
+        if not texts:
+            return embeddings
+        
+        try:
+            requests = "\n".join(
+                json.dumps({
+                    "custom_id": str(i),
+                    "method": "POST",
+                    "url": "/v1/embeddings",
+                    "body": {"model": EMBEDDING_MODEL, "input": text}
+                })
+                for i, text in enumerate(texts)
+            )
+            input_file = await self.client.files.create(
+                file=("embeddings.jsonl", requests.encode("utf-8")),
+                purpose="batch"
+            )
+            batch = await self.client.batches.create(
+                input_file_id=input_file.id,
+                endpoint="/v1/embeddings",
+                completion_window="24h"
+            )
+            
+            while batch.status not in BATCH_FINAL_STATUSES:
+                await asyncio.sleep(poll_interval)
+                batch = await self.client.batches.retrieve(batch.id)
+            
+            if batch.status != "completed" or not batch.output_file_id:
+                logger.error(f"Embedding batch {batch.id} ended with status {batch.status}")
+                return embeddings
+            
+            output = await self.client.files.content(batch.output_file_id)
+            for line in output.text.splitlines():
+                result = json.loads(line)
+                response = result.get("response") or {}
+                if result.get("error") or response.get("status_code") != 200:
+                    error = result.get("error") or f"HTTP {response.get('status_code')}"
+                    logger.error(f"Embedding batch request {result['custom_id']} failed: {error}")
+                    continue
+                embeddings[int(result["custom_id"])] = response["body"]["data"][0]["embedding"]
+        except Exception as e:
+            logger.error(f"Error generating embeddings in batch: {e}")
+        
+        return embeddings
+    
     async def search_similar_messages(
         self, 
+        db: AsyncSession,
         query_embedding: List[float],
-        stored_embeddings: List[Dict[str, Any]],
-        limit: int = 5
-    ) -> List[Dict[str, Any]]:
-        """Find similar messages using cosine similarity (simplified version)"""
-        # This is a basic implementation. In production, you'd use a proper vector database
-        # like pgvector with proper similarity search
-        
-        if not query_embedding or not stored_embeddings:
+        limit: int = 5,
+        user_id: Optional[int] = None
+    ) -> List[ChatMessage]:
+        """Find the messages closest to the query embedding by cosine distance
+
+        Runs as an approximate nearest-neighbour search on the pgvector HNSW index;
+        pass `user_id` to restrict the search to that user's sessions.
+        """
+        if not query_embedding or limit <= 0:
             return []
         
-        similarities = []
-        for stored in stored_embeddings:
-            if not stored.get('embedding'):
-                continue
-            
-            # Simple dot product similarity (assuming normalized vectors)
-            similarity = sum(a * b for a, b in zip(query_embedding, stored['embedding']))
-            similarities.append({
-                'similarity': similarity,
-                'message': stored
-            })
-        
-        # Sort by similarity and return top results
-        similarities.sort(key=lambda x: x['similarity'], reverse=True)
-        return [item['message'] for item in similarities[:limit]]
+        query = select(ChatMessage).options(defer(ChatMessage.embedding)).where(
+            ChatMessage.embedding.is_not(None)
+        )
+        if user_id is not None:
+            query = query.join(ChatSession).where(ChatSession.user_id == user_id)
+        
+        # Tune the HNSW search for this transaction; it needs at least `limit` candidates
+        await db.execute(
+            select(func.set_config("hnsw.ef_search", str(max(settings.hnsw_ef_search, limit)), True))
+        )
+        result = await db.scalars(
+            # Same half-precision expression as the HNSW index, so the index is used
+            query.order_by(
+                cast(ChatMessage.embedding, HALFVEC(1536)).cosine_distance(query_embedding)
+            ).limit(limit)
+        )
+        return list(result)
 
 # Create a singleton instance
 openai_service = OpenAIService()
\ No newline at end of file
@@ -140,7 +140,15 @@ class ChatbotApp {
     async loadTechStacks() {
         try {
             // Load available tech stacks
-            const available = await this.makeRequest('/techstack/available', 'GET');
+            // (paged by id; keep fetching until a short page comes back)
+            const pageSize = 100;
+            const available = [];
+            let page;
+            do {
+                const afterId = available.length ? `&after_id=${available[available.length - 1].id}` : '';
+                page = await this.makeRequest(`/techstack/available?limit=${pageSize}${afterId}`, 'GET');
+                available.push(...page);
+            } while (page.length === pageSize);
             this.availableTechStacks = available;
             
             // Load categories
@@ -282,18 +290,34 @@ class ChatbotApp {
         this.addMessageToChat('user', message);
         input.value = '';
         
+        let reply = '';
+        let replyText = null;
         try {
             this.showTypingIndicator();
-            const response = await this.makeRequest('/chat/message', 'POST', {
+            // Render the answer as it streams in instead of waiting for the full completion
+            await this.streamRequest('/chat/message/stream', {
                 content: message,
                 session_id: this.currentSessionId
+            }, (chunk) => {
+                if (!replyText) {
+                    this.removeTypingIndicator();
+                    replyText = this.addMessageToChat('assistant', '').querySelector('.message-content');
+                }
+                reply += chunk;
+                replyText.innerHTML = this.formatMessage(reply);
+                const container = document.getElementById('chat-messages');
+                container.scrollTop = container.scrollHeight;
             });
             
             this.removeTypingIndicator();
-            this.addMessageToChat('assistant', response.message);
         } catch (error) {
             this.removeTypingIndicator();
-            this.addMessageToChat('assistant', 'Sorry, I encountered an error. Please try again.');
+            if (!replyText) {
+                this.addMessageToChat('assistant', 'Sorry, I encountered an error. Please try again.');
+            } else {
+                // The reply was cut off partway; say so under the partial text
+                replyText.innerHTML = this.formatMessage(reply) + '<br><br><em>The response was interrupted. Please try again.</em>';
+            }
             console.error('Error sending message:', error);
         }
     }
@@ -321,7 +345,7 @@ class ChatbotApp {
                     <i class="fas fa-robot text-blue-600 mt-1"></i>
                     <div>
                         <p class="font-semibold text-blue-700">AI Assistant</p>
-                        <p>${this.formatMessage(content)}</p>
+                        <p class="message-content">${this.formatMessage(content)}</p>
                     </div>
                 </div>
             `;
@@ -329,6 +353,7 @@ class ChatbotApp {
         
         container.appendChild(messageDiv);
         container.scrollTop = container.scrollHeight;
+        return messageDiv;
     }
     
     formatMessage(content) {
@@ -491,6 +516,44 @@ class ChatbotApp {
         
         return await response.json();
     }
+    
+    async streamRequest(endpoint, data, onChunk) {
+        // POST and read a server-sent event stream, calling onChunk with each text chunk
+        const headers = { 'Content-Type': 'application/json' };
+        if (this.token) {
+            headers.Authorization = `Bearer ${this.token}`;
+        }
+        
+        const response = await fetch(this.apiUrl + endpoint, {
+            method: 'POST',
+            headers,
+            body: JSON.stringify(data),
+        });
+        
+        if (!response.ok) {
+            const errorData = await response.json().catch(() => ({ detail: 'Unknown error' }));
+            throw new Error(errorData.detail || 'Request failed');
+        }
+        
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        while (true) {
+            const { done, value } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+            
+            const events = buffer.split('\n\n');
+            buffer = events.pop();
+            for (const event of events) {
+                const payload = event.replace(/^data: /, '');
+                if (payload === '[DONE]') return;
+                const parsed = JSON.parse(payload);
+                if (parsed.error) throw new Error(parsed.error);
+                onChunk(parsed.content);
+            }
+        }
+    }
 }
 
 // Initialize the app when the page loads
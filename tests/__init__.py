@@ -0,0 +1 @@
+# This makes the tests directory a Python package
\ No newline at end of file
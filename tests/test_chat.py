@@ -0,0 +1,97 @@
+import os
+
+# Settings are read at import time; tests never reach these services
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("DATABASE_URL", "postgresql://test@localhost/test")
+os.environ.setdefault("SECRET_KEY", "test")
+
+import json
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+import httpx
+from fastapi import FastAPI
+
+from app.auth import get_current_active_user
+from app.cache import get_redis
+from app.database import get_db
+from app.routes import chat
+from app.services.openai_service import openai_service
+
+def chunk(text):
+    """A streamed chat completion chunk carrying one piece of text"""
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+class BrokenStream:
+    """A completion stream that fails after sending its first chunk"""
+
+    def __init__(self, first_text):
+        self.first_text = first_text
+        self.sent = False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.sent:
+            raise RuntimeError("connection reset")
+        self.sent = True
+        return chunk(self.first_text)
+
+def read_events(body):
+    """The data payloads of a server-sent event stream"""
+    return [event[len("data: "):] for event in body.split("\n\n") if event]
+
+class StreamInterruptedTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        async def create(**kwargs):
+            return BrokenStream("Use a thread pool ")
+
+        patches = [
+            mock.patch.object(openai_service.client.chat.completions, "create", create),
+            mock.patch.object(chat, "prepare_chat_turn", mock.AsyncMock(
+                return_value=(SimpleNamespace(id=1), [], [])
+            )),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def test_service_raises_after_first_chunk(self):
+        chunks = []
+        with self.assertRaises(RuntimeError):
+            async for text in openai_service.generate_chat_response_stream("How do I scale this?", []):
+                chunks.append(text)
+
+        self.assertEqual(chunks, ["Use a thread pool "])
+
+    async def test_endpoint_sends_error_and_skips_save(self):
+        app = FastAPI()
+        app.include_router(chat.router, prefix="/chat")
+        app.dependency_overrides[get_current_active_user] = lambda: SimpleNamespace(id=1)
+        app.dependency_overrides[get_db] = lambda: None
+        app.dependency_overrides[get_redis] = lambda: None
+
+        with mock.patch.object(chat, "save_chat_exchange", mock.AsyncMock()) as save:
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                response = await client.post(
+                    "/chat/message/stream",
+                    json={"content": "How do I scale this?", "session_id": "s1"}
+                )
+
+        events = read_events(response.text)
+        self.assertEqual(json.loads(events[0]), {"content": "Use a thread pool "})
+        self.assertEqual(json.loads(events[-1]), {"error": chat.STREAM_INTERRUPTED_MESSAGE})
+        self.assertNotIn("[DONE]", events)
+        save.assert_not_awaited()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+import os
+
+# Settings are read at import time; tests never reach these services
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("DATABASE_URL", "postgresql://test@localhost/test")
+os.environ.setdefault("SECRET_KEY", "test")
+
+import json
+import re
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from app.routes import interview
+
+def question(number, **overrides):
+    """A valid generated question"""
+    return {
+        "question": f"Question {number}?",
+        "category": "Technical",
+        "difficulty_level": "Mid-level",
+        "tech_stack": "Python",
+        "expected_answer": "Key points",
+        **overrides
+    }
+
+def completion(content, finish_reason="stop"):
+    """A chat completion response with a single choice"""
+    return SimpleNamespace(choices=[
+        SimpleNamespace(finish_reason=finish_reason, message=SimpleNamespace(content=content))
+    ])
+
+class FakeChatClient:
+    """Answers each per-question completion with the reply for its position in the set"""
+
+    def __init__(self, replies):
+        self.replies = replies
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, messages, **kwargs):
+        position = int(re.search(r"question (\d+) of a", messages[0]["content"]).group(1))
+        return self.replies[position - 1]
+
+class GenerateInterviewQuestionsTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        # Each test runs its own event loop, so start without a semaphore bound to an old one
+        patches = [
+            mock.patch.object(interview, "_generation_semaphore", None),
+            mock.patch.object(interview, "cache_get", mock.AsyncMock(return_value=None)),
+            mock.patch.object(interview, "cache_set", mock.AsyncMock()),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def generate(self, replies):
+        with mock.patch.object(interview.openai_service, "client", FakeChatClient(replies)):
+            return await interview.generate_interview_questions_with_ai(
+                years_of_experience=3,
+                target_role="Backend Engineer",
+                tech_stack=["Python"],
+                focus_areas=[],
+                num_questions=len(replies)
+            )
+
+    async def test_complete_set_is_returned_and_cached(self):
+        questions = await self.generate([
+            completion(json.dumps({"questions": [question(number)]})) for number in range(1, 4)
+        ])
+
+        self.assertEqual(
+            [q.question for q in questions], ["Question 1?", "Question 2?", "Question 3?"]
+        )
+        interview.cache_set.assert_awaited_once()
+
+    async def test_invalid_question_only_drops_itself(self):
+        questions = await self.generate([
+            completion(json.dumps({"questions": [question(1)]})),
+            completion(json.dumps({"questions": [question(2, tech_stack=["Python", "Go"])]})),
+            completion(json.dumps({"questions": [question(3)]})),
+        ])
+
+        self.assertEqual([q.question for q in questions], ["Question 1?", "Question 3?"])
+        interview.cache_set.assert_not_awaited()
+
+    async def test_unusable_replies_only_drop_their_question(self):
+        questions = await self.generate([
+            completion(None),
+            completion('{"questions": [{"question": "Cut o', finish_reason="length"),
+            completion("[]"),
+            completion(json.dumps({"items": [question(4)]})),
+            completion(json.dumps({"questions": [question(5)]})),
+        ])
+
+        self.assertEqual([q.question for q in questions], ["Question 5?"])
+        interview.cache_set.assert_not_awaited()
+
+    async def test_extra_questions_in_a_reply_are_ignored(self):
+        questions = await self.generate([
+            completion(json.dumps({"questions": [question(1), question(10), question(11)]})),
+            completion(json.dumps({"questions": [question(2)]})),
+        ])
+
+        self.assertEqual([q.question for q in questions], ["Question 1?", "Question 2?"])
+
+if __name__ == "__main__":
+    unittest.main()